@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+from logs.logging_config import logger
+from logs.metrics import registry
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+def normalize_question(question: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", question.lower()).split())
+
+class AnswerCache:
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, ttl: float = ANSWER_CACHE_TTL,
+                 threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._docs: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._docs.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._docs[key[0]]
+
+    def _live(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] < now:
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, doc_hash: str, question: str, vector=None) -> Optional[str]:
+        key = (doc_hash, normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[0]
+
+            if vector is not None and self.threshold < 1.0:
+                candidates = [k for k in list(self._docs.get(doc_hash, ())) if self._live(k, now) is not None]
+                if candidates:
+                    query = np.asarray(vector, dtype=np.float32)
+                    query = query / (np.linalg.norm(query) or 1.0)
+                    similarities = np.stack([self._entries[k][1] for k in candidates]) @ query
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        self._entries.move_to_end(candidates[best])
+                        self.semantic_hits += 1
+                        logger.debug(f"Semantic answer cache hit ({similarities[best]:.3f}) for: {question}")
+                        return self._entries[candidates[best]][0]
+
+            self.misses += 1
+            return None
+
+    def put(self, doc_hash: str, question: str, answer: str, vector=None):
+        key = (doc_hash, normalize_question(question))
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (answer, vector, time.monotonic() + self.ttl)
+            if vector is not None:
+                self._docs.setdefault(doc_hash, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+            }
+
+answer_cache = AnswerCache()
+registry.gauge("mediclaim_answer_cache", "Answer cache entries and hit/miss counters.", answer_cache.stats)
@@ -0,0 +1,131 @@
+import re
+import json
+from pathlib import Path
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import ConfigDict, Field
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+VOCAB_FILE = "bm25_vocab.json"
+ARRAYS = ("indptr", "postings", "freqs", "doc_lengths")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    def __init__(self, vocab: Dict[str, int], indptr, postings, freqs, doc_lengths, k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.postings = postings
+        self.freqs = freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.num_docs = len(doc_lengths)
+        df = np.diff(indptr).astype(np.float32)
+        self.idf = np.log((self.num_docs - df + 0.5) / (df + 0.5) + 1.0)
+        avgdl = float(np.mean(doc_lengths)) if self.num_docs else 1.0
+        self.length_norm = k1 * (1 - b + b * np.asarray(doc_lengths, dtype=np.float32) / max(avgdl, 1e-9))
+
+    @classmethod
+    def build(cls, texts: List[str], counts: Optional[List[Optional[Dict[str, float]]]] = None, **kwargs) -> "BM25Index":
+        vocab, term_ids, doc_ids, tfs, doc_lengths = {}, [], [], [], []
+        for doc_id, text in enumerate(texts):
+            reused = counts[doc_id] if counts else None
+            counts_for_doc = reused if reused is not None else Counter(tokenize(text))
+            doc_lengths.append(sum(counts_for_doc.values()))
+            for term, tf in counts_for_doc.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=indptr[1:])
+        postings = np.asarray(doc_ids, dtype=np.int32)[order]
+        freqs = np.asarray(tfs, dtype=np.float32)[order]
+        return cls(vocab, indptr, postings, freqs, np.asarray(doc_lengths, dtype=np.int32), **kwargs)
+
+    def doc_term_counts(self) -> List[Dict[str, float]]:
+        terms = sorted(self.vocab, key=self.vocab.get)
+        term_of_posting = np.repeat(np.arange(len(terms)), np.diff(self.indptr))
+        counts = [{} for _ in range(self.num_docs)]
+        for term, doc, tf in zip(term_of_posting.tolist(), np.asarray(self.postings).tolist(), np.asarray(self.freqs).tolist()):
+            counts[doc][terms[term]] = tf
+        return counts
+
+    def save(self, directory):
+        directory = Path(directory)
+        for name in ARRAYS:
+            np.save(directory / f"bm25_{name}.npy", getattr(self, name))
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(directory / VOCAB_FILE, "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+
+    @classmethod
+    def load(cls, directory, **kwargs) -> "BM25Index":
+        directory = Path(directory)
+        with open(directory / VOCAB_FILE, "r", encoding="utf-8") as f:
+            vocab = {term: i for i, term in enumerate(json.load(f))}
+        arrays = {name: np.load(directory / f"bm25_{name}.npy", mmap_mode="r") for name in ARRAYS}
+        return cls(vocab, **arrays, **kwargs)
+
+    def score_batch(self, queries: List[str]) -> np.ndarray:
+        query_terms = [[self.vocab[t] for t in tokenize(q) if t in self.vocab] for q in queries]
+        terms = np.unique([t for ids in query_terms for t in ids]).astype(np.int64)
+        scores = np.zeros((len(queries), self.num_docs), dtype=np.float32)
+        if not len(terms):
+            return scores
+
+        column = {t: i for i, t in enumerate(terms.tolist())}
+        query_matrix = np.zeros((len(queries), len(terms)), dtype=np.float32)
+        for row, ids in enumerate(query_terms):
+            for t in ids:
+                query_matrix[row, column[t]] += 1
+
+        starts = np.asarray(self.indptr[terms])
+        lengths = np.asarray(self.indptr[terms + 1]) - starts
+        rows = np.repeat(np.arange(len(terms)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        docs = np.asarray(self.postings[positions])
+        tf = np.asarray(self.freqs[positions])
+
+        weights = np.zeros((len(terms), self.num_docs), dtype=np.float32)
+        weights[rows, docs] = self.idf[terms][rows] * tf * (self.k1 + 1) / (tf + self.length_norm[docs])
+        return query_matrix @ weights
+
+    def search(self, queries: List[str], k: int) -> List[List[Tuple[int, float]]]:
+        scores = self.score_batch(queries)
+        k = min(k, self.num_docs)
+        if k <= 0:
+            return [[] for _ in queries]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for i, row in enumerate(top):
+            row = row[np.argsort(-scores[i, row], kind="stable")]
+            results.append(list(zip(row.tolist(), scores[i, row].tolist())))
+        return results
+
+    def top_k(self, queries: List[str], k: int) -> List[List[int]]:
+        return [[i for i, _ in hits] for hits in self.search(queries, k)]
+
+class BM25IndexRetriever(BaseRetriever):
+    index: Any
+    chunks: Any
+    k: int = 5
+    cache: Dict[str, List[int]] = Field(default_factory=dict)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def prefetch(self, queries: List[str]):
+        self.cache.update(zip(queries, self.index.top_k(queries, self.k)))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        ids = self.cache.get(query)
+        if ids is None:
+            ids = self.index.top_k([query], self.k)[0]
+        return [self.chunks[i] for i in ids]
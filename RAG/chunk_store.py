@@ -0,0 +1,76 @@
+from pathlib import Path
+from collections.abc import Sequence
+from typing import List
+import numpy as np
+from langchain_core.documents import Document
+
+TEXTS_FILE = "texts.bin"
+OFFSETS_FILE = "offsets.npy"
+PAGES_FILE = "pages.npy"
+HASHES_FILE = "chunk_hashes.npy"
+
+class ChunkStore(Sequence):
+    def __init__(self, texts, offsets, pages, hashes, source: str = "DOC", **extra):
+        self.texts = texts
+        self.offsets = offsets
+        self.pages = pages
+        self.hashes = hashes
+        self.source = source
+        self.extra = extra
+
+    @classmethod
+    def load(cls, directory, source: str = "DOC") -> "ChunkStore":
+        directory = Path(directory)
+        return cls(
+            np.memmap(directory / TEXTS_FILE, dtype=np.uint8, mode="r"),
+            np.load(directory / OFFSETS_FILE, mmap_mode="r"),
+            np.load(directory / PAGES_FILE, mmap_mode="r"),
+            np.load(directory / HASHES_FILE, mmap_mode="r"),
+            source,
+        )
+
+    @staticmethod
+    def write(directory, chunks: List[Document]):
+        directory = Path(directory)
+        encoded = [c.page_content.encode("utf-8") for c in chunks]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        with open(directory / TEXTS_FILE, "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(directory / OFFSETS_FILE, offsets)
+        np.save(directory / PAGES_FILE, np.asarray([c.metadata.get("page") or 0 for c in chunks], dtype=np.int32))
+        np.save(directory / HASHES_FILE, np.asarray([c.metadata["chunk_hash"] for c in chunks], dtype="S64"))
+
+    def with_metadata(self, **extra) -> "ChunkStore":
+        return ChunkStore(self.texts, self.offsets, self.pages, self.hashes, extra.pop("source", self.source),
+                          **{**self.extra, **extra})
+
+    @property
+    def text_bytes(self) -> int:
+        return int(self.offsets[-1])
+
+    def chunk_hashes(self) -> List[str]:
+        return [h.decode("ascii") for h in self.hashes.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return Document(
+            page_content=bytes(self.texts[start:end]).decode("utf-8"),
+            metadata={
+                "line": i + 1,
+                "chunk_id": i,
+                "chunk_hash": self.hashes[i].decode("ascii"),
+                "page": int(self.pages[i]),
+                "source": self.source,
+                **self.extra,
+            },
+        )
@@ -0,0 +1,70 @@
+from typing import Any, List, Sequence
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from langchain_core.documents import Document, BaseDocumentTransformer
+from langchain_core.embeddings import Embeddings
+from logs.metrics import span
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def cluster_representatives(normalized: np.ndarray, num_clusters: int, iterations: int = 20) -> List[int]:
+    n = len(normalized)
+    k = min(num_clusters, n)
+    if k <= 0:
+        return []
+    centroids = normalized[np.linspace(0, n - 1, k).astype(int)]
+    for _ in range(iterations):
+        assignment = np.argmax(normalized @ centroids.T, axis=1)
+        updated = np.stack([
+            normalized[assignment == c].mean(axis=0) if np.any(assignment == c) else centroids[c]
+            for c in range(k)
+        ])
+        updated = normalize_rows(updated)
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    closest = np.argmax(normalized @ centroids.T, axis=0)
+    return sorted(set(closest.tolist()))
+
+def drop_redundant(normalized: np.ndarray, candidates: List[int], threshold: float) -> List[int]:
+    if not candidates:
+        return []
+    similarity = normalized[candidates] @ normalized[candidates].T
+    kept = []
+    for i in range(len(candidates)):
+        if all(similarity[i, j] < threshold for j in kept):
+            kept.append(i)
+    return [candidates[i] for i in kept]
+
+class StoredVectorFilter(BaseDocumentTransformer, BaseModel):
+    vectors: Any
+    embeddings: Embeddings
+    num_clusters: int = 4
+    threshold: float = 0.8
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _document_vectors(self, documents: Sequence[Document]) -> np.ndarray:
+        ids = [doc.metadata.get("chunk_id") for doc in documents]
+        matrix = np.zeros((len(documents), self.vectors.shape[1]), dtype=np.float32)
+        known = [i for i, chunk_id in enumerate(ids) if chunk_id is not None and chunk_id < len(self.vectors)]
+        if known:
+            matrix[known] = self.vectors[[ids[i] for i in known]]
+        unknown = sorted(set(range(len(documents))) - set(known))
+        if unknown:
+            matrix[unknown] = self.embeddings.embed_documents([documents[i].page_content for i in unknown])
+        return matrix
+
+    def transform_documents(self, documents: Sequence[Document], **kwargs: Any) -> Sequence[Document]:
+        documents = list(documents)
+        if not documents:
+            return documents
+        with span("compression", documents_in=len(documents)) as counts:
+            normalized = normalize_rows(self._document_vectors(documents))
+            representatives = cluster_representatives(normalized, self.num_clusters)
+            kept = drop_redundant(normalized, representatives, self.threshold)
+            counts["documents_out"] = len(kept)
+        return [documents[i] for i in kept]
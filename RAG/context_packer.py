@@ -0,0 +1,67 @@
+import os
+from typing import List, Sequence, Tuple
+from langchain_core.documents import Document
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))
+MIN_OVERLAP = 16
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN) + 1 if text else 0
+
+def overlap_length(left: str, right: str, limit: int = 1000) -> int:
+    for size in range(min(len(left), len(right), limit), MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def merge_spans(documents: Sequence[Document]) -> List[dict]:
+    first_seen = {}
+    for rank, doc in enumerate(documents):
+        chunk_id = doc.metadata.get("chunk_id")
+        key = (str(doc.metadata.get("source")), 0, chunk_id) if isinstance(chunk_id, int) else ("", 1, rank)
+        first_seen.setdefault(key, (rank, doc))
+
+    spans = []
+    for (source, _, chunk_id), (rank, doc) in sorted(first_seen.items(), key=lambda item: item[0]):
+        last = spans[-1] if spans else None
+        if last and last["source"] == source and last["last_id"] is not None and chunk_id == last["last_id"] + 1:
+            text = doc.page_content
+            overlap = overlap_length(last["text"], text)
+            last["text"] += text[overlap:] if overlap else "\n" + text
+            last["last_id"] = chunk_id
+            last["rank"] = min(last["rank"], rank)
+            last["chunks"] += 1
+        else:
+            contiguous = isinstance(doc.metadata.get("chunk_id"), int)
+            spans.append({"source": source, "last_id": chunk_id if contiguous else None, "rank": rank,
+                          "text": doc.page_content, "chunks": 1})
+    return spans
+
+def pack_context(documents: Sequence[Document], budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[str, dict]:
+    spans = merge_spans(documents)
+    for s in spans:
+        s["tokens"] = estimate_tokens(s["text"])
+
+    packed, used = [], 0
+    for s in sorted(spans, key=lambda s: (s["rank"], s["tokens"])):
+        if used + s["tokens"] <= budget:
+            packed.append(s)
+            used += s["tokens"]
+        elif not packed:
+            s["text"] = s["text"][:int(budget * CHARS_PER_TOKEN)]
+            s["tokens"] = estimate_tokens(s["text"])
+            packed.append(s)
+            used += s["tokens"]
+
+    order = {id(s): i for i, s in enumerate(spans)}
+    packed.sort(key=lambda s: order[id(s)])
+    usage = {
+        "chunks_in": len(documents),
+        "spans": len(spans),
+        "spans_packed": len(packed),
+        "input_tokens": sum(estimate_tokens(d.page_content) for d in documents),
+        "context_tokens": used,
+        "budget": budget,
+    }
+    return "\n\n".join(s["text"] for s in packed), usage
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from RAG.index_store import index_store, file_hash, file_lock, write_json
+from RAG.embedding import GoogleEmbedding
+from RAG.answer_cache import answer_cache
+from RAG.database import load_or_build_index, generate_answers
+from logs.logging_config import logger
+from logs.metrics import span
+
+CORPUS_FILE = os.getenv("CORPUS_FILE", str(index_store.root / "corpus.json"))
+CORPUS_SEARCH_WORKERS = int(os.getenv("CORPUS_SEARCH_WORKERS", "8"))
+CORPUS_SHARD_CACHE = int(os.getenv("CORPUS_SHARD_CACHE", "64"))
+CORPUS_TOP_K = int(os.getenv("CORPUS_TOP_K", "8"))
+VECTOR_WEIGHT, KEYWORD_WEIGHT, RRF_K = 0.7, 0.3, 60
+
+def matches(metadata: dict, filters: Dict) -> bool:
+    for key, expected in (filters or {}).items():
+        values = expected if isinstance(expected, list) else [expected]
+        if str(metadata.get(key)) not in [str(v) for v in values]:
+            return False
+    return True
+
+class NoMatchingDocuments(LookupError):
+    pass
+
+class Shard:
+    def __init__(self, entry: dict):
+        self.doc_id = entry["doc_id"]
+        self.doc_hash = entry["doc_hash"]
+        opened = index_store.open(entry["doc_hash"])
+        self.chunks = opened.chunks.with_metadata(**{**entry["metadata"], "source": self.doc_id, "doc_id": self.doc_id})
+        self.vectors = opened.vectors
+        self.bm25 = opened.bm25
+
+class Corpus:
+    def __init__(self, path: str = CORPUS_FILE, workers: int = CORPUS_SEARCH_WORKERS,
+                 shard_cache: int = CORPUS_SHARD_CACHE):
+        self.path = Path(path)
+        self.workers = workers
+        self.shard_cache = shard_cache
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.entries = {}
+        self._refresh()
+
+    def _refresh(self):
+        # Other worker processes register documents too; pick up their changes when the file moves.
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            self._mtime = mtime
+        except (OSError, ValueError):
+            pass
+
+    @contextmanager
+    def _update(self):
+        with self._lock, file_lock(self.path.with_suffix(".lock")):
+            self._refresh()
+            yield
+            self._save()
+
+    def _uses(self, doc_hash: str) -> bool:
+        return any(e["doc_hash"] == doc_hash for e in self.entries.values())
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(self.path, self.entries)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def register(self, doc_id: str, file_path, metadata: Optional[dict] = None, embedding=None) -> dict:
+        doc_hash = file_hash(file_path)
+        chunks = load_or_build_index(doc_hash, file_path, embedding or GoogleEmbedding(), source=doc_id, doc_key=doc_id)
+        index_store.pin(doc_hash)
+        entry = {"doc_id": doc_id, "doc_hash": doc_hash, "metadata": metadata or {},
+                 "chunks": len(chunks), "registered": time.time()}
+        with self._update():
+            previous = self.entries.get(doc_id)
+            self.entries[doc_id] = entry
+            self._shards.pop(doc_id, None)
+            if previous and not self._uses(previous["doc_hash"]):
+                index_store.pin(previous["doc_hash"], False)
+        logger.info(f"Registered corpus document {doc_id} ({len(chunks)} chunks, {doc_hash[:12]})")
+        return entry
+
+    def remove(self, doc_id: str) -> bool:
+        with self._update():
+            entry = self.entries.pop(doc_id, None)
+            self._shards.pop(doc_id, None)
+            if entry and not self._uses(entry["doc_hash"]):
+                index_store.pin(entry["doc_hash"], False)
+        return entry is not None
+
+    def select(self, filters: Optional[Dict] = None) -> List[dict]:
+        with self._lock:
+            self._refresh()
+            return [e for e in self.entries.values() if matches(e["metadata"], filters)]
+
+    def shard(self, entry: dict) -> Shard:
+        with self._lock:
+            shard = self._shards.get(entry["doc_id"])
+            if shard is not None and shard.doc_hash == entry["doc_hash"]:
+                self._shards.move_to_end(entry["doc_id"])
+                return shard
+        shard = Shard(entry)
+        with self._lock:
+            self._shards[entry["doc_id"]] = shard
+            while len(self._shards) > self.shard_cache:
+                self._shards.popitem(last=False)
+        return shard
+
+    def search(self, questions: List[str], query_vectors, entries: List[dict], k: int = CORPUS_TOP_K) -> List[List[Document]]:
+        if not entries or not questions:
+            return [[] for _ in questions]
+
+        def search_shard(entry):
+            shard = self.shard(entry)
+            return shard, shard.vectors.search(query_vectors, k), shard.bm25.search(questions, k)
+
+        with span("corpus_search", shards=len(entries), questions=len(questions)):
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(entries)), thread_name_prefix="shard") as executor:
+                futures = [executor.submit(contextvars.copy_context().run, search_shard, e) for e in entries]
+                results = [future.result() for future in futures]
+
+        merged = []
+        for q in range(len(questions)):
+            vector_hits = sorted(
+                ((score, shard, i) for shard, hits, _ in results for i, score in hits[q]), key=lambda hit: -hit[0]
+            )[:k]
+            keyword_hits = sorted(
+                ((score, shard, i) for shard, _, hits in results for i, score in hits[q] if score > 0), key=lambda hit: -hit[0]
+            )[:k]
+            fused = {}
+            for ranked, weight in ((vector_hits, VECTOR_WEIGHT), (keyword_hits, KEYWORD_WEIGHT)):
+                for rank, (_, shard, i) in enumerate(ranked):
+                    score, doc = fused.get((shard.doc_id, i), (0.0, shard.chunks[i]))
+                    fused[(shard.doc_id, i)] = (score + weight / (rank + 1 + RRF_K), doc)
+            merged.append([doc for _, doc in sorted(fused.values(), key=lambda item: -item[0])[:k]])
+        return merged
+
+    def answer(self, questions: List[str], filters: Optional[Dict] = None) -> dict:
+        entries = self.select(filters)
+        if not entries:
+            raise NoMatchingDocuments(f"No corpus documents match filters {filters or {}}")
+        cache_key = "corpus:" + hashlib.sha256("|".join(sorted(e["doc_hash"] for e in entries)).encode()).hexdigest()
+        embedding = GoogleEmbedding()
+        query_vectors = embedding.embed_queries(questions)
+
+        with span("answer_cache", questions=len(questions)) as counts:
+            response = [answer_cache.get(cache_key, q, v) for q, v in zip(questions, query_vectors)]
+            pending = [i for i, answer in enumerate(response) if answer is None]
+            counts.update(cache_hits=len(questions) - len(pending), cache_misses=len(pending))
+
+        documents = self.search([questions[i] for i in pending], [query_vectors[i] for i in pending], entries)
+        pending, documents = [i for i, docs in zip(pending, documents) if docs], [docs for docs in documents if docs]
+        answers = generate_answers([questions[i] for i in pending], documents)
+        for i, answer in zip(pending, answers):
+            response[i] = answer
+            answer_cache.put(cache_key, questions[i], answer, query_vectors[i])
+        return {"answers": response, "documents": [e["doc_id"] for e in entries]}
+
+corpus = Corpus()
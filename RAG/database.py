@@ -1,83 +1,42 @@
 import os
+import json
+import shutil
+import contextvars
+from typing import Iterator, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain.vectorstores import Chroma
-from langchain_core.embeddings import Embeddings
-from langchain.retrievers import BM25Retriever, EnsembleRetriever
+from langchain.retrievers import EnsembleRetriever
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import CohereRerank, DocumentCompressorPipeline
-from langchain.document_transformers import (
-    EmbeddingsClusteringFilter,
-    EmbeddingsRedundantFilter,
-    LongContextReorder
-)
 from langchain.prompts import PromptTemplate
-from langchain.chains.retrieval_qa.base import RetrievalQA
-from RAG.load_text import load_data
-from RAG.splitting import split_text
+from langchain_core.documents import Document
+from RAG.ingest import ingest
+from RAG.index_store import index_store, file_hash
+from RAG.chunk_store import ChunkStore
+from RAG.embedding import GoogleEmbedding
+from RAG.compression import StoredVectorFilter
+from RAG.context_packer import pack_context, estimate_tokens, CONTEXT_TOKEN_BUDGET
+from RAG.bm25 import BM25Index, BM25IndexRetriever
+from RAG.vector_store import VectorIndex, VectorIndexRetriever
+from RAG.scheduler import answer_scheduler
+from RAG.answer_cache import answer_cache
+from RAG.single_flight import SingleFlight
+from RAG.planner import plan_retrieval
 from pydantic_models import state
 from llm import model
+from logs.logging_config import logger
+from logs.metrics import registry, span, annotate
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", "200"))
+index_flight = SingleFlight("index")
+LLM_TOKENS = registry.counter("mediclaim_llm_tokens_total", "LLM tokens spent on answers by kind (prompt, completion).")
+REINDEX_CHUNKS = registry.counter("mediclaim_reindex_chunks_total", "Chunks of re-indexed documents by outcome (reused, embedded, tombstoned).")
 
-class GoogleEmbedding(Embeddings):
-    def embed_documents(self, texts):
-        return [genai.embed_content(
-            model="models/embedding-001",
-            content=doc,
-            task_type="retrieval_document"
-        )["embedding"] for doc in texts]
-
-    def embed_query(self, text):
-        return genai.embed_content(
-            model="models/embedding-001",
-            content=text,
-            task_type="retrieval_query"
-        )["embedding"]
-
-def vector_Search(st: state):
-    text = load_data(st.file_path)
-    chunks = split_text(text)
-    embedding = GoogleEmbedding()
-
-    if not os.path.exists("chroma_db"):
-        Chroma.from_documents(chunks, embedding=embedding, persist_directory="chroma_db").persist()
-
-    vector_retriever = Chroma(
-        persist_directory="chroma_db", 
-        embedding_function=embedding
-    ).as_retriever(search_kwargs={"k": 8})
-    
-    keyword_retriever = BM25Retriever.from_documents(chunks)
-    keyword_retriever.k = 5
-
-    retriever = EnsembleRetriever(
-        retrievers=[vector_retriever, keyword_retriever],
-        weights=[0.7, 0.3]
-    )
-    
-    num_docs = len(chunks)
-    clusters = min(4, num_docs)
-    
-    filter1 = EmbeddingsClusteringFilter(embeddings=embedding, num_clusters=clusters)
-    filter2 = EmbeddingsRedundantFilter(embeddings=embedding, threshold=0.8)
-    
-    reordering1 = LongContextReorder()
-
-    pipeline = DocumentCompressorPipeline(
-        transformers=[filter1, filter2, reordering1]
-    )
-
-    compression_retriever = ContextualCompressionRetriever(
-        base_compressor=pipeline,
-        base_retriever=retriever
-    )
-
-    prompt_template = PromptTemplate(
-        input_variables=["context", "question"],
-        template="""You are a highly skilled Policy Document Analyst. Your task is to extract accurate, legally worded summaries from insurance policy documents.
+prompt_template = PromptTemplate(
+    input_variables=["context", "question"],
+    template="""You are a highly skilled Policy Document Analyst. Your task is to extract accurate, legally worded summaries from insurance policy documents.
 
 **CONTEXT:**
 {context}
@@ -95,17 +54,163 @@ def vector_Search(st: state):
 - Do **not** include "**Section 4.2.c**" unless essential; prefer quoting or paraphrasing the clause content.
 
 **FINAL ANSWER:**"""
+)
+
+def load_previous(doc_key: str, doc_hash: str):
+    previous = index_store.latest_for(doc_key) if doc_key else None
+    if not previous or previous == doc_hash or not index_store.exists(previous):
+        return None, {}, {}
+    try:
+        opened = index_store.open(previous)
+        hashes = opened.chunks.chunk_hashes()
+        counts = opened.bm25.doc_term_counts()
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not reuse previous index {previous[:12]} for {doc_key}: {e}")
+        return None, {}, {}
+    return previous, dict(zip(hashes, opened.vectors.vectors)), dict(zip(hashes, counts))
+
+def load_or_build_index(doc_hash: str, file_path, embedding, source: str = "DOC", doc_key: str = None):
+    return index_flight.do(doc_hash, _load_or_build_index, doc_hash, file_path, embedding, source, doc_key)
+
+def _load_or_build_index(doc_hash: str, file_path, embedding, source: str = "DOC", doc_key: str = None):
+    with index_store.build_lock(doc_hash):
+        if index_store.exists(doc_hash):
+            logger.debug(f"Index cache hit for {doc_hash[:12]}")
+            with span("index_load", cache_hits=1) as counts:
+                chunks = index_store.load_chunks(doc_hash)
+                counts["chunks"] = len(chunks)
+            return chunks
+
+        index_dir = index_store.staging(doc_hash)
+        try:
+            previous, reuse_vectors, reuse_counts = load_previous(doc_key, doc_hash)
+            chunks, vectors, report = ingest(file_path, embedding, source=source, reuse=reuse_vectors)
+            hashes = [c.metadata["chunk_hash"] for c in chunks]
+            tombstones = sorted(set(reuse_vectors) - set(hashes))
+            report["tombstoned"] = len(tombstones)
+            with span("index_build", chunks=len(chunks)):
+                VectorIndex.build(vectors).save(index_dir)
+                BM25Index.build([c.page_content for c in chunks], counts=[reuse_counts.get(h) for h in hashes]).save(index_dir)
+                ChunkStore.write(index_dir, chunks)
+                if previous:
+                    with open(index_dir / "tombstones.json", "w", encoding="utf-8") as f:
+                        json.dump({"previous": previous, "chunk_hashes": tombstones}, f)
+            index_store.publish(doc_hash, index_dir, source=source, chunks=len(chunks), previous=previous,
+                                reused=report["reused"], embedded=report["embedded"], tombstoned=report["tombstoned"])
+        except Exception:
+            shutil.rmtree(index_dir, ignore_errors=True)
+            raise
+        if doc_key:
+            index_store.set_latest(doc_key, doc_hash)
+            if previous:
+                index_store.supersede(previous, doc_hash)
+        for outcome in ("reused", "embedded", "tombstoned"):
+            REINDEX_CHUNKS.inc(report[outcome], outcome=outcome)
+        annotate("reindex", **report)
+        logger.info(f"Indexed {source}: {report['reused']} chunks reused, {report['embedded']} re-embedded, "
+                    f"{report['tombstoned']} tombstoned")
+        return index_store.load_chunks(doc_hash)
+
+def stream_answers(questions: List[str], documents: List[List[Document]]) -> Iterator[Tuple[int, str]]:
+    with span("context_packing", questions=len(questions)) as counts:
+        packed = [pack_context(docs) for docs in documents]
+        counts.update(
+            input_tokens=sum(usage["input_tokens"] for _, usage in packed),
+            context_tokens=sum(usage["context_tokens"] for _, usage in packed),
+        )
+
+    prompts = [prompt_template.format(context=context, question=q) for q, (context, _) in zip(questions, packed)]
+    messages = answer_scheduler.iter(
+        model.invoke, prompts, tokens=[estimate_tokens(p) + ANSWER_MAX_TOKENS for p in prompts], span_name="answer"
     )
 
-    hybrid_chain = RetrievalQA.from_chain_type(
-        llm=model,
-        chain_type="stuff",
-        retriever=compression_retriever,
-        chain_type_kwargs={"prompt": prompt_template}
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    for i, message in messages:
+        reported = getattr(message, "usage_metadata", None) or {}
+        usage["prompt_tokens"] += reported.get("input_tokens") or estimate_tokens(prompts[i])
+        usage["completion_tokens"] += reported.get("output_tokens") or estimate_tokens(message.content)
+        yield i, message.content
+    for kind in ("prompt", "completion"):
+        LLM_TOKENS.inc(usage[f"{kind}_tokens"], kind=kind)
+    annotate("token_usage", **usage)
+    logger.info(f"Token usage for {len(questions)} questions: {usage['prompt_tokens']} prompt, "
+                f"{usage['completion_tokens']} completion (context budget {CONTEXT_TOKEN_BUDGET} per question)")
+
+def generate_answers(questions: List[str], documents: List[List[Document]]) -> List[str]:
+    answers = [None] * len(questions)
+    for i, answer in stream_answers(questions, documents):
+        answers[i] = answer
+    return answers
+
+def build_retriever(plan: str, doc_hash: str, chunks: ChunkStore, embedding, questions: List[str], query_vectors):
+    opened = index_store.open(doc_hash)
+    keyword_retriever = BM25IndexRetriever(index=opened.bm25, chunks=chunks, k=8 if plan == "bm25" else 5)
+    with span("bm25", questions=len(questions)):
+        keyword_retriever.prefetch(questions)
+    if plan == "bm25":
+        return keyword_retriever
+
+    vector_index = opened.vectors
+    vector_retriever = VectorIndexRetriever(index=vector_index, chunks=chunks, embeddings=embedding, k=8)
+    with span("vector_index", questions=len(questions), chunks=vector_index.size):
+        vector_retriever.prefetch(questions, query_vectors)
+
+    retriever = EnsembleRetriever(
+        retrievers=[vector_retriever, keyword_retriever],
+        weights=[0.7, 0.3]
     )
+    if plan == "hybrid":
+        return retriever
 
-    questions = [{"query": q} for q in st.input]
-    results = hybrid_chain.apply(questions)
-    response = [r["result"] for r in results]
+    vector_filter = StoredVectorFilter(vectors=vector_index.vectors, embeddings=embedding, num_clusters=4, threshold=0.8)
+    pipeline = DocumentCompressorPipeline(
+        transformers=[vector_filter]
+    )
+
+    return ContextualCompressionRetriever(
+        base_compressor=pipeline,
+        base_retriever=retriever
+    )
+
+def iter_answers(st: state) -> Iterator[Tuple[int, str]]:
+    st.doc_hash = st.doc_hash or file_hash(st.file_path)
+    embedding = GoogleEmbedding()
+    chunks = load_or_build_index(st.doc_hash, st.file_path, embedding, source=st.doc_name or "DOC", doc_key=st.doc_name)
+
+    query_vectors = embedding.embed_queries(st.input)
+    with span("answer_cache", questions=len(st.input)) as counts:
+        response = [answer_cache.get(st.doc_hash, q, v) for q, v in zip(st.input, query_vectors)]
+        pending = [i for i, answer in enumerate(response) if answer is None]
+        counts.update(cache_hits=len(st.input) - len(pending), cache_misses=len(pending))
+    for i, answer in enumerate(response):
+        if answer is not None:
+            yield i, answer
+    if not pending:
+        return
+
+    questions = [st.input[i] for i in pending]
+    plan = plan_retrieval(chunks, len(questions), st.latency_budget)
+    annotate("retrieval_plan", **plan)
+    logger.info(f"Retrieval plan for {st.doc_name or st.doc_hash[:12]}: {plan['plan']} ({plan['reason']}, "
+                f"estimated {plan['estimated_retrieval_seconds']}s retrieval + {plan['estimated_answer_seconds']}s answers)")
+
+    with span(f"retrieval_{plan['plan']}", questions=len(questions)):
+        if plan["plan"] == "stuff":
+            documents = [chunks] * len(questions)
+        else:
+            retriever = build_retriever(plan["plan"], st.doc_hash, chunks, embedding, questions, [query_vectors[i] for i in pending])
+            with ThreadPoolExecutor(max_workers=min(8, len(questions)), thread_name_prefix="retrieve") as executor:
+                futures = [executor.submit(contextvars.copy_context().run, retriever.invoke, q) for q in questions]
+                documents = [future.result() for future in futures]
+
+    for j, answer in stream_answers(questions, documents):
+        answer_cache.put(st.doc_hash, st.input[pending[j]], answer, query_vectors[pending[j]])
+        yield pending[j], answer
+    logger.debug(f"Answer cache: {len(st.input) - len(pending)} hits, {len(pending)} misses {answer_cache.stats()}")
+
+def vector_Search(st: state):
+    response = [None] * len(st.input)
+    for i, answer in iter_answers(st):
+        response[i] = answer
     st.rag_ans=response
     return st
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from logs.logging_config import logger
+from logs.metrics import span
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embedding_cache/embeddings.sqlite3")
+
+class GoogleEmbeddingBackend:
+    def __init__(self):
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        self._genai = genai
+
+    def __call__(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        return self._genai.embed_content(model=model, content=texts, task_type=task_type)["embedding"]
+
+class FakeEmbeddingBackend:
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+        self.calls = 0
+        self.texts = 0
+        self._tokens: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._tokens.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha256(token.encode()).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._tokens[token] = vector
+        return vector
+
+    def __call__(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+            vectors = []
+            for text in texts:
+                vector = np.zeros(self.dim, dtype=np.float32)
+                for token in re.findall(r"[a-z0-9]+", text.lower()):
+                    vector += self._token_vector(token)
+                norm = np.linalg.norm(vector)
+                vectors.append((vector / norm if norm else vector).tolist())
+            return vectors
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMBED_CACHE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, task_type: str, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}|{task_type}|{text_hash}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype=np.float32).tolist()) for k, v in rows)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        rows = [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+
+_default_backend = None
+_default_cache = None
+_defaults_lock = threading.Lock()
+
+def default_backend():
+    global _default_backend
+    with _defaults_lock:
+        if _default_backend is None:
+            _default_backend = FakeEmbeddingBackend() if EMBEDDING_BACKEND == "fake" else GoogleEmbeddingBackend()
+        return _default_backend
+
+def default_cache() -> EmbeddingCache:
+    global _default_cache
+    with _defaults_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
+
+class GoogleEmbedding(Embeddings):
+    def __init__(self, model: str = EMBEDDING_MODEL, backend=None, cache: Optional[EmbeddingCache] = None,
+                 batch_size: int = EMBED_BATCH_SIZE, max_concurrency: int = EMBED_MAX_CONCURRENCY):
+        self.model = model
+        self.backend = backend or default_backend()
+        self.cache = cache or default_cache()
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+
+    def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        with span("embedding", texts=len(texts)) as counts:
+            vectors = self._embed_cached(texts, task_type, counts)
+        return vectors
+
+    def _embed_cached(self, texts: List[str], task_type: str, counts: dict) -> List[List[float]]:
+        keys = [EmbeddingCache.key(self.model, task_type, t) for t in texts]
+        vectors = self.cache.get_many(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        if missing:
+            pending = list(missing.items())
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+
+            def embed_batch(batch):
+                return self.backend(self.model, [text for _, text in batch], task_type)
+
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(batches)))) as executor:
+                for batch, result in zip(batches, executor.map(embed_batch, batches)):
+                    fresh = {key: vector for (key, _), vector in zip(batch, result)}
+                    self.cache.put_many(fresh)
+                    vectors.update(fresh)
+
+        counts.update(cache_hits=len(texts) - len(missing), embedded=len(missing))
+        logger.debug(f"Embedded {len(texts)} texts ({len(missing)} new, {len(batches) if missing else 0} batches)")
+        return [vectors[key] for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "retrieval_document")
+
+    def embed_query(self, text):
+        return self._embed([text], "retrieval_query")[0]
+
+    def embed_queries(self, texts):
+        return self._embed(list(texts), "retrieval_query")
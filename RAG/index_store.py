@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Optional
+from RAG.chunk_store import ChunkStore
+from RAG.vector_store import VectorIndex
+from RAG.bm25 import BM25Index
+from logs.logging_config import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_STORE_DIR = os.getenv("INDEX_STORE_DIR", "index_store")
+INDEX_STORE_MAX_ENTRIES = int(os.getenv("INDEX_STORE_MAX_ENTRIES", "200"))
+INDEX_STORE_MAX_BYTES = int(os.getenv("INDEX_STORE_MAX_BYTES", str(2 * 1024 ** 3)))
+OPEN_INDEX_CACHE = int(os.getenv("OPEN_INDEX_CACHE", "32"))
+
+INDEX_FORMAT = 6
+META_FILE = "meta.json"
+DOCUMENTS_DIR = "documents"
+STAGING_DIR = ".staging"
+LOCKS_DIR = ".locks"
+STALE_STAGING_SECONDS = 3600
+
+def file_hash(file_path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def write_json(path: Path, data):
+    partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+
+@contextmanager
+def file_lock(path: Path):
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class OpenIndex:
+    def __init__(self, path: Path, source: str):
+        self.path = path
+        self.chunks = ChunkStore.load(path, source)
+        self.vectors = VectorIndex.load(path)
+        self.bm25 = BM25Index.load(path)
+
+class IndexStore:
+    def __init__(self, root: str = INDEX_STORE_DIR, max_entries: int = INDEX_STORE_MAX_ENTRIES,
+                 max_bytes: int = INDEX_STORE_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._open = OrderedDict()
+
+    def path(self, doc_hash: str) -> Path:
+        return self.root / doc_hash
+
+    def exists(self, doc_hash: str) -> bool:
+        try:
+            with open(self.path(doc_hash) / META_FILE, "r", encoding="utf-8") as f:
+                return json.load(f).get("format") == INDEX_FORMAT
+        except (OSError, ValueError):
+            return False
+
+    def _meta(self, doc_hash: str) -> dict:
+        with open(self.path(doc_hash) / META_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @contextmanager
+    def build_lock(self, doc_hash: str):
+        with self._lock:
+            thread_lock = self._build_locks.setdefault(doc_hash, threading.Lock())
+        with thread_lock, file_lock(self.root / LOCKS_DIR / f"{doc_hash}.lock"):
+            yield
+
+    def touch(self, doc_hash: str):
+        try:
+            os.utime(self.path(doc_hash) / META_FILE)
+        except OSError:
+            pass
+
+    def open(self, doc_hash: str) -> OpenIndex:
+        path = self.path(doc_hash)
+        with self._lock:
+            index = self._open.get(doc_hash)
+            if index is not None and (path / META_FILE).exists():
+                self._open.move_to_end(doc_hash)
+                return index
+            self._open.pop(doc_hash, None)
+        index = OpenIndex(path, self._meta(doc_hash).get("source", "DOC"))
+        with self._lock:
+            self._open[doc_hash] = index
+            while len(self._open) > OPEN_INDEX_CACHE:
+                self._open.popitem(last=False)
+        return index
+
+    def load_chunks(self, doc_hash: str) -> ChunkStore:
+        chunks = self.open(doc_hash).chunks
+        self.touch(doc_hash)
+        return chunks
+
+    def staging(self, doc_hash: str) -> Path:
+        path = self.root / STAGING_DIR / f"{doc_hash}-{uuid.uuid4().hex}"
+        path.mkdir(parents=True)
+        return path
+
+    def publish(self, doc_hash: str, staging: Path, **meta):
+        meta.update({"doc_hash": doc_hash, "format": INDEX_FORMAT, "created": time.time(), "bytes": dir_size(staging)})
+        write_json(staging / META_FILE, meta)
+        self.discard(doc_hash)
+        os.rename(staging, self.path(doc_hash))
+        logger.info(f"Index {doc_hash[:12]} published ({meta['bytes']} bytes)")
+        self.evict(keep=doc_hash)
+
+    def _document_path(self, doc_key: str) -> Path:
+        return self.root / DOCUMENTS_DIR / f"{hashlib.sha256(doc_key.encode('utf-8')).hexdigest()}.json"
+
+    def latest_for(self, doc_key: str) -> Optional[str]:
+        try:
+            with open(self._document_path(doc_key), "r", encoding="utf-8") as f:
+                return json.load(f)["doc_hash"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set_latest(self, doc_key: str, doc_hash: str):
+        path = self._document_path(doc_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(path, {"doc_key": doc_key, "doc_hash": doc_hash, "updated": time.time()})
+
+    def update_meta(self, doc_hash: str, **fields):
+        meta_path = self.path(doc_hash) / META_FILE
+        try:
+            stat = meta_path.stat()
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta.update(fields)
+            write_json(meta_path, meta)
+            os.utime(meta_path, (stat.st_atime, stat.st_mtime))
+        except (OSError, ValueError):
+            pass
+
+    def supersede(self, doc_hash: str, replacement: str):
+        self.update_meta(doc_hash, superseded_by=replacement)
+
+    def pin(self, doc_hash: str, pinned: bool = True):
+        self.update_meta(doc_hash, pinned=pinned)
+
+    def discard(self, doc_hash: str):
+        with self._lock:
+            self._open.pop(doc_hash, None)
+        trash = self.root / STAGING_DIR / f"discard-{doc_hash}-{uuid.uuid4().hex}"
+        try:
+            trash.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(self.path(doc_hash), trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def sweep_staging(self):
+        cutoff = time.time() - STALE_STAGING_SECONDS
+        for path in (self.root / STAGING_DIR).glob("*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def entries(self):
+        entries = []
+        for meta_path in self.root.glob(f"*/{META_FILE}"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["last_used"] = meta_path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append(meta)
+        return sorted(entries, key=lambda m: ("superseded_by" not in m, m["last_used"]))
+
+    def evict(self, keep: Optional[str] = None):
+        self.sweep_staging()
+        victims = []
+        with self._lock:
+            entries = self.entries()
+            total = sum(m.get("bytes", 0) for m in entries)
+            count = len(entries)
+            for meta in entries:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                if meta["doc_hash"] == keep or meta.get("pinned"):
+                    continue
+                victims.append(meta["doc_hash"])
+                count -= 1
+                total -= meta.get("bytes", 0)
+        for doc_hash in victims:
+            self.discard(doc_hash)
+            logger.info(f"Evicted index {doc_hash[:12]}")
+
+index_store = IndexStore()
@@ -0,0 +1,66 @@
+import time
+import contextvars
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain_core.documents import Document
+from RAG.load_text import iter_pages
+from RAG.splitting import split_pages
+from logs.logging_config import logger
+from logs.metrics import record
+
+def ingest(file_path, embedding, source: str = "DOC", batch_size: int = None,
+           reuse: Optional[Dict[str, np.ndarray]] = None) -> Tuple[List[Document], np.ndarray, dict]:
+    batch_size = batch_size or getattr(embedding, "batch_size", 64)
+    workers = getattr(embedding, "max_concurrency", 4)
+    reuse = reuse or {}
+    chunks, batch, positions, futures = [], [], [], []
+    vectors = {}
+    timings = {"load": 0.0, "split": 0.0, "pages": 0}
+
+    def timed_pages():
+        pages = iter_pages(file_path)
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            timings["load"] += time.perf_counter() - start
+            if page is None:
+                return
+            timings["pages"] += 1
+            yield page
+
+    def submit(texts, at):
+        futures.append((at, executor.submit(contextvars.copy_context().run, embedding.embed_documents, texts)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as executor:
+        split_start = time.perf_counter()
+        for chunk in split_pages(timed_pages(), source):
+            chunks.append(chunk)
+            known = reuse.get(chunk.metadata["chunk_hash"])
+            if known is not None:
+                vectors[len(chunks) - 1] = known
+                continue
+            batch.append(chunk.page_content)
+            positions.append(len(chunks) - 1)
+            if len(batch) >= batch_size:
+                submit(batch, positions)
+                batch, positions = [], []
+        if batch:
+            submit(batch, positions)
+        timings["split"] = time.perf_counter() - split_start - timings["load"]
+        wait_start = time.perf_counter()
+        for at, future in futures:
+            vectors.update(zip(at, future.result()))
+
+    record("loader", timings["load"], pages=timings["pages"])
+    record("splitter", timings["split"], chunks=len(chunks))
+    record("embedding_wait", time.perf_counter() - wait_start, batches=len(futures))
+
+    if not chunks:
+        raise ValueError(f"No text could be extracted from {source}")
+    report = {"chunks": len(chunks), "reused": len(chunks) - sum(len(at) for at, _ in futures)}
+    report["embedded"] = len(chunks) - report["reused"]
+    logger.info(f"Ingested {len(chunks)} chunks from {source}: {report['reused']} reused, "
+                f"{report['embedded']} embedded in {len(futures)} batches")
+    matrix = np.asarray([vectors[i] for i in range(len(chunks))], dtype=np.float32).reshape(len(chunks), -1)
+    return chunks, matrix, report
@@ -1,29 +1,82 @@
 import os
+import threading
+import multiprocessing
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 import pdfplumber
-from logs.logging_config import logger
+from logs.logging_config import logger, console_only
 
 load_dotenv()
 
-def load_pdf(file_path: str) -> str:
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or (os.cpu_count() or 1)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+def extract_page(page) -> list:
+    content = []
+    if page.edges:
+        for table in page.extract_tables() or []:
+            table_text = "\n".join(["\t".join(cell or "" for cell in row) for row in table])
+            content.append(f"[TABLE]\n{table_text}\n[/TABLE]")
+    text = page.extract_text()
+    if text:
+        content.append(text)
+    return content
+
+def iter_page_contents(file_path: str, start: int, end: int):
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:end]:
+            yield extract_page(page)
+            page.flush_cache()
+
+def extract_page_range(args) -> list:
+    return list(iter_page_contents(*args))
+
+def page_ranges(num_pages: int, workers: int) -> list:
+    size = max(1, -(-num_pages // (workers * 4)))
+    return [(start, min(start + size, num_pages)) for start in range(0, num_pages, size)]
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def pdf_pool(workers: int) -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=console_only)
+        return _pdf_pool
+
+def iter_pdf_pages(file_path: str, workers: int = None):
+    workers = workers or PDF_WORKERS
+    yielded = False
     try:
         with pdfplumber.open(file_path) as pdf:
-            content = []
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables or []:
-                    table_text = "\n".join(["\t".join(cell or "" for cell in row) for row in table])
-                    content.append(f"[TABLE]\n{table_text}\n[/TABLE]")
-                text = page.extract_text()
-                if text:
-                    content.append(text)
-            return "\n\n".join(content)
+            num_pages = len(pdf.pages)
+
+        if workers <= 1 or num_pages < PDF_PARALLEL_MIN_PAGES:
+            results = [iter_page_contents(file_path, 0, num_pages)]
+        else:
+            ranges = [(file_path, start, end) for start, end in page_ranges(num_pages, workers)]
+            results = pdf_pool(workers).map(extract_page_range, ranges)
+
+        page_number = 0
+        for pages in results:
+            for page in pages:
+                page_number += 1
+                yielded = True
+                yield page_number, "\n\n".join(page)
     except Exception as e:
+        if yielded:
+            raise
         logger.warning(f"pdfplumber failed, falling back to PyPDFLoader: {e}")
-        return "\n".join(doc.page_content for doc in PyPDFLoader(file_path).load())
+        for number, doc in enumerate(PyPDFLoader(file_path).load(), 1):
+            yield number, doc.page_content
+
+def load_pdf(file_path: str, workers: int = None) -> str:
+    return "\n\n".join(text for _, text in iter_pdf_pages(file_path, workers) if text)
 
 def load_txt(file_path: str) -> str:
     return "\n".join(doc.page_content for doc in TextLoader(file_path).load())
@@ -69,6 +122,18 @@ def load_data(file_path: str) -> str:
     ext = os.path.splitext(file_path)[1].lower()
     return load_by_extension(file_path, detect_file_type(file_path, header, ext))
 
+def iter_pages(file_path: str):
+    file_path = str(Path(file_path).resolve())
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    with open(file_path, 'rb') as f:
+        header = f.read(50)
+    ext = detect_file_type(file_path, header, os.path.splitext(file_path)[1].lower())
+    if ext == '.pdf':
+        yield from iter_pdf_pages(file_path)
+    else:
+        yield 1, load_by_extension(file_path, ext)
+
 def load_and_store_to_pinecone(file_path: str, index_name: str = "document-index"):
     content = load_data(file_path)
     doc = Document(
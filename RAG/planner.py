@@ -0,0 +1,56 @@
+import os
+import math
+from typing import Optional
+from RAG.chunk_store import ChunkStore
+from RAG.context_packer import CHARS_PER_TOKEN, CONTEXT_TOKEN_BUDGET
+from RAG.scheduler import answer_scheduler
+from logs.metrics import registry, observed
+
+RETRIEVAL_PLAN = os.getenv("RETRIEVAL_PLAN", "auto")
+PLAN_HYBRID_MAX_CHUNKS = int(os.getenv("PLAN_HYBRID_MAX_CHUNKS", "60"))
+PLANS = ("stuff", "bm25", "hybrid", "full")
+
+# Seconds per question for each plan until enough requests have been observed.
+DEFAULT_COSTS = {"stuff": 0.0005, "bm25": 0.002, "hybrid": 0.005, "full": 0.03}
+DEFAULT_ANSWER_SECONDS = 2.0
+
+PLAN_COUNTER = registry.counter("mediclaim_retrieval_plans_total", "Retrieval plans chosen by the planner.")
+PLAN_ESTIMATES = registry.histogram("mediclaim_retrieval_plan_estimated_seconds", "Retrieval time the planner estimated for the chosen plan.")
+
+def plan_cost(plan: str, questions: int) -> float:
+    per_question = observed(f"retrieval_{plan}", "questions")
+    return (per_question if per_question is not None else DEFAULT_COSTS[plan]) * questions
+
+def answer_cost(questions: int) -> float:
+    per_call = observed("answer")
+    waves = math.ceil(questions / max(1, answer_scheduler.max_in_flight))
+    return (per_call if per_call is not None else DEFAULT_ANSWER_SECONDS) * waves
+
+def plan_retrieval(chunks: ChunkStore, questions: int, latency_budget: Optional[float] = None) -> dict:
+    doc_tokens = int(chunks.text_bytes / CHARS_PER_TOKEN)
+    if RETRIEVAL_PLAN in PLANS:
+        plan, reason = RETRIEVAL_PLAN, "forced by RETRIEVAL_PLAN"
+    elif doc_tokens <= CONTEXT_TOKEN_BUDGET:
+        plan, reason = "stuff", f"document fits the {CONTEXT_TOKEN_BUDGET}-token context budget"
+    else:
+        plan = "hybrid" if len(chunks) <= PLAN_HYBRID_MAX_CHUNKS else "full"
+        reason = f"{len(chunks)} chunks"
+        if latency_budget is not None:
+            remaining = latency_budget - answer_cost(questions)
+            for candidate in PLANS[PLANS.index(plan):0:-1]:
+                plan = candidate
+                if plan_cost(candidate, questions) <= remaining:
+                    break
+            reason += f", {max(remaining, 0):.2f}s of the {latency_budget:.2f}s budget left for retrieval"
+
+    estimate = plan_cost(plan, questions)
+    PLAN_COUNTER.inc(plan=plan)
+    PLAN_ESTIMATES.observe(estimate, plan=plan)
+    return {
+        "plan": plan,
+        "reason": reason,
+        "chunks": len(chunks),
+        "document_tokens": doc_tokens,
+        "estimated_retrieval_seconds": round(estimate, 4),
+        "estimated_answer_seconds": round(answer_cost(questions), 4),
+    }
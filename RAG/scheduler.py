@@ -0,0 +1,109 @@
+import os
+import time
+import random
+import threading
+import contextvars
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logs.logging_config import logger
+from logs.metrics import span
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+ANSWER_TOKEN_ESTIMATE = int(os.getenv("ANSWER_TOKEN_ESTIMATE", "1000"))
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                self._cond.wait((amount - self.tokens) / self.rate)
+
+    def drain(self):
+        with self._cond:
+            self._refill()
+            self.tokens = 0
+
+def is_rate_limited(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    message = str(exc).lower()
+    return status == 429 or "rate limit" in message or "rate_limit" in message
+
+def retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class AnswerScheduler:
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, rpm: int = GROQ_RPM, tpm: int = GROQ_TPM,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE):
+        self.max_in_flight = max_in_flight
+        self.in_flight = threading.BoundedSemaphore(max(1, max_in_flight))
+        self.requests = TokenBucket(rpm, rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, tpm) if tpm > 0 else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def run(self, func: Callable, *args, tokens: int = ANSWER_TOKEN_ESTIMATE, span_name: str = "llm"):
+        for attempt in range(self.max_retries + 1):
+            if self.requests:
+                self.requests.acquire(1)
+            if self.tokens:
+                self.tokens.acquire(tokens)
+            try:
+                with self.in_flight, span(span_name, tokens=tokens, retries=attempt):
+                    return func(*args)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after(e) or self.backoff_base * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Rate limited by LLM provider, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                if self.requests:
+                    self.requests.drain()
+                time.sleep(delay)
+
+    def iter(self, func: Callable, items: List, tokens: Union[int, List[int]] = ANSWER_TOKEN_ESTIMATE,
+             span_name: str = "llm") -> Iterator[Tuple[int, Any]]:
+        if not items:
+            return
+        costs = tokens if isinstance(tokens, list) else [tokens] * len(items)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items)), thread_name_prefix="answer")
+        try:
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.run, func, item, tokens=cost, span_name=span_name): i
+                for i, (item, cost) in enumerate(zip(items, costs))
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def map(self, func: Callable, items: List, tokens: Union[int, List[int]] = ANSWER_TOKEN_ESTIMATE,
+            span_name: str = "llm") -> List:
+        results = [None] * len(items)
+        for i, result in self.iter(func, items, tokens=tokens, span_name=span_name):
+            results[i] = result
+        return results
+
+answer_scheduler = AnswerScheduler()
@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+from logs.logging_config import logger
+from logs.metrics import registry
+
+COALESCED = registry.counter("mediclaim_singleflight_coalesced_total", "Calls that waited on identical in-flight work instead of repeating it.")
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            COALESCED.inc(step=self.name)
+            logger.debug(f"Waiting on in-flight {self.name} for {key}")
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
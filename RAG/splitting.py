@@ -1,16 +1,20 @@
+import hashlib
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from logs.logging_config import logger
 from langchain_core.documents import Document
 
+def get_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+
 def split_text(text: str):
     try:
-        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        splitter = get_splitter()
         chunks = splitter.split_text(text)
 
         docs = [
             Document(
                 page_content=chunk,
-                metadata={"line": idx + 1, "source": "DOC"}  
+                metadata={"line": idx + 1, "chunk_id": idx, "source": "DOC"}
             )
             for idx, chunk in enumerate(chunks)
         ]
@@ -20,3 +24,20 @@ def split_text(text: str):
         logger.error(f"Error in splitting text: {e}")
         raise
 
+def split_pages(pages, source: str = "DOC"):
+    splitter = get_splitter()
+    idx = 0
+    for page_number, text in pages:
+        for chunk in splitter.split_text(text or ""):
+            yield Document(
+                page_content=chunk,
+                metadata={
+                    "line": idx + 1,
+                    "chunk_id": idx,
+                    "chunk_hash": hashlib.sha256(chunk.encode("utf-8")).hexdigest(),
+                    "page": page_number,
+                    "source": source,
+                }
+            )
+            idx += 1
+    logger.debug(f"Split {idx} chunks from streamed pages of {source}")
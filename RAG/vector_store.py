@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from pydantic import ConfigDict, Field
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from RAG.compression import normalize_rows
+
+VECTORS_FILE = "vectors.npy"
+
+class VectorIndex:
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    @property
+    def size(self) -> int:
+        return len(self.vectors)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray) -> "VectorIndex":
+        return cls(normalize_rows(np.asarray(vectors, dtype=np.float32)))
+
+    def save(self, directory):
+        np.save(Path(directory) / VECTORS_FILE, self.vectors)
+
+    @classmethod
+    def load(cls, directory) -> "VectorIndex":
+        return cls(np.load(Path(directory) / VECTORS_FILE, mmap_mode="r"))
+
+    def search(self, query_vectors, k: int) -> List[List[Tuple[int, float]]]:
+        k = min(k, self.size)
+        if k <= 0 or not len(query_vectors):
+            return [[] for _ in query_vectors]
+        queries = normalize_rows(np.asarray(query_vectors, dtype=np.float32))
+        scores = queries @ np.asarray(self.vectors).T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for i, row in enumerate(top):
+            row = row[np.argsort(-scores[i, row], kind="stable")]
+            results.append(list(zip(row.tolist(), scores[i, row].tolist())))
+        return results
+
+    def top_k(self, query_vectors, k: int) -> List[List[int]]:
+        return [[i for i, _ in hits] for hits in self.search(query_vectors, k)]
+
+class VectorIndexRetriever(BaseRetriever):
+    index: Any
+    chunks: Any
+    embeddings: Embeddings
+    k: int = 8
+    cache: Dict[str, List[int]] = Field(default_factory=dict)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def prefetch(self, queries: List[str], query_vectors=None):
+        if query_vectors is None:
+            query_vectors = [self.embeddings.embed_query(q) for q in queries]
+        self.cache.update(zip(queries, self.index.top_k(query_vectors, self.k)))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        ids = self.cache.get(query)
+        if ids is None:
+            ids = self.index.top_k([self.embeddings.embed_query(query)], self.k)[0]
+        return [self.chunks[i] for i in ids]
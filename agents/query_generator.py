@@ -1,15 +1,21 @@
+import os
 from langchain.output_parsers import PydanticOutputParser
-from pydantic_models import state, query
+from pydantic_models import state, query, queries
 from langchain.prompts import PromptTemplate
 from llm import model
 from logs.logging_config import logger
+from RAG.scheduler import answer_scheduler
+from RAG.context_packer import estimate_tokens
+from agents.query_normalizer import normalize_query
 
-def query_generator(st: state):
-    try:
-        combined_input = "\n".join([f"{i+1}. {inp}" for i, inp in enumerate(st.input)])
-        parser = PydanticOutputParser(pydantic_object=query)
+QUERY_LOCAL_CONFIDENCE = float(os.getenv("QUERY_LOCAL_CONFIDENCE", "0.6"))
+QUERY_TOKENS_PER_INPUT = int(os.getenv("QUERY_TOKENS_PER_INPUT", "50"))
+
+def llm_extract(inputs):
+    combined_input = "\n".join([f"{i+1}. {inp}" for i, inp in enumerate(inputs)])
+    parser = PydanticOutputParser(pydantic_object=queries)
 
-        template = """
+    template = """
 You are an expert at extracting key information from user queries about insurance claims.
 
 For each user input, extract the CORE QUESTION/PROCEDURE by:
@@ -32,28 +38,42 @@ Core: "cardiac surgery benefits"
 User inputs:
 {user_input}
 
-Extract core procedure/question for each input above.
+Return exactly one item per input above, in the same order.
 """.strip()
 
-        prompt_template = PromptTemplate(
-            template=template,
-            input_variables=["user_input"],
-            partial_variables={"format_instructions": parser.get_format_instructions()}
-        )
-
-        formatted_prompt = prompt_template.format(user_input=combined_input)
-        response = model.invoke(formatted_prompt)
-        
-        try:
-            parsed_response = parser.parse(response.content)
-            st.questions = parsed_response if isinstance(parsed_response, list) else [parsed_response]
-        except:
-            st.questions = [query(procedure=inp.strip()) for inp in st.input]
-
-        logger.debug("All questions parsed successfully!")
+    prompt_template = PromptTemplate(
+        template=template,
+        input_variables=["user_input"],
+        partial_variables={"format_instructions": parser.get_format_instructions()}
+    )
+
+    formatted_prompt = prompt_template.format(user_input=combined_input)
+    tokens = estimate_tokens(formatted_prompt) + QUERY_TOKENS_PER_INPUT * len(inputs)
+    response = answer_scheduler.run(model.invoke, formatted_prompt, tokens=tokens, span_name="llm_query_generator")
+
+    try:
+        items = parser.parse(response.content).items
+    except Exception:
+        items = []
+    if len(items) != len(inputs):
+        logger.warning(f"Query generator returned {len(items)} items for {len(inputs)} inputs, using raw inputs")
+        return [query(procedure=inp.strip()) for inp in inputs]
+    return items
+
+def query_generator(st: state):
+    try:
+        normalized = [normalize_query(inp) for inp in st.input]
+        st.questions = [q for q, _ in normalized]
+        fallback = [i for i, (_, confidence) in enumerate(normalized) if confidence < QUERY_LOCAL_CONFIDENCE]
+
+        if fallback:
+            for i, parsed in zip(fallback, llm_extract([st.input[i] for i in fallback])):
+                st.questions[i] = parsed if parsed.procedure else query(procedure=st.input[i].strip())
+
+        logger.debug(f"All questions parsed successfully! ({len(st.input) - len(fallback)} local, {len(fallback)} via LLM)")
         return st
 
     except Exception as e:
         logger.error(f"Failed to generate question(s): {e}")
         st.questions = [query(procedure=inp) for inp in st.input] if st.input else []
-        return st
\ No newline at end of file
+        return st
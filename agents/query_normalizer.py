@@ -0,0 +1,102 @@
+import re
+from typing import Tuple
+from pydantic_models import query
+
+FILLER_WORDS = {
+    "what", "whats", "how", "can", "could", "would", "will", "should", "please", "kindly", "is", "are", "was",
+    "were", "be", "been", "the", "a", "an", "of", "for", "to", "do", "does", "did", "you", "me", "i", "my",
+    "we", "our", "us", "tell", "help", "understand", "explain", "know", "want", "there", "any", "about",
+    "under", "this", "that", "these", "those", "it", "its", "with", "if", "in", "on", "at", "by", "which",
+    "when", "where", "who", "whom", "am", "get", "let", "need", "like", "have", "has", "and", "or", "s",
+    "male", "female", "man", "woman",
+}
+VAGUE_WORDS = {"it", "this", "that", "they", "them", "same", "above", "previous", "mentioned"}
+
+# A capitalised phrase after in/at/from that is not a known place may be a city or a treatment
+# ("from Day Care procedures"); leave it in the procedure and let the LLM decide.
+GUESSED_LOCATION_CONFIDENCE = 0.5
+
+KNOWN_LOCATIONS = {
+    "mumbai", "delhi", "new delhi", "bangalore", "bengaluru", "chennai", "kolkata", "hyderabad", "pune",
+    "ahmedabad", "jaipur", "lucknow", "noida", "gurgaon", "gurugram", "chandigarh", "kochi", "indore",
+    "bhopal", "nagpur", "patna", "surat", "india",
+}
+
+NON_LOCATIONS = {
+    "Section", "Clause", "Table", "Part", "Schedule", "Annexure", "Appendix", "Policy", "Plan", "Case",
+    "Hospital", "Addition", "Respect", "Excess", "Force", "Accordance", "Relation", "Terms", "Order",
+}
+
+UNIT = r"(day|week|month|year|yr)s?"
+DURATION_POLICY_RE = re.compile(rf"\b(\d+)\s*-?\s*{UNIT}\s*-?\s*(?:old\s+)?(?:insurance\s+)?(?:policy|plan|cover|coverage|insurance)\b", re.I)
+AGE_RES = [
+    re.compile(r"\b(\d{1,3})\s*-?\s*(?:years?|yrs?|y)\s*-?\s*old\b", re.I),
+    re.compile(r"\b(?:age|aged)\s*:?\s*(\d{1,3})\b", re.I),
+    re.compile(r"\b(\d{1,3})\s*-?\s*(?:[mf]|male|female)\b", re.I),
+]
+DURATION_RE = re.compile(rf"\b(\d+)\s*-?\s*{UNIT}\b", re.I)
+LOCATION_RE = re.compile(r"\b(?:in|at|from)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)")
+WORD_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+def _cut(text: str, match) -> str:
+    return text[:match.start()] + " " + text[match.end():]
+
+def _duration(match) -> str:
+    unit = match.group(2).lower().replace("yr", "year")
+    count = int(match.group(1))
+    return f"{count} {unit}{'s' if count != 1 else ''}"
+
+def normalize_query(text: str) -> Tuple[query, float]:
+    remaining = text
+    age = duration = location = None
+
+    match = DURATION_POLICY_RE.search(remaining)
+    if match:
+        duration = _duration(match)
+        remaining = _cut(remaining, match)
+
+    for pattern in AGE_RES:
+        match = pattern.search(remaining)
+        if match and 0 < int(match.group(1)) < 120:
+            age = int(match.group(1))
+            remaining = _cut(remaining, match)
+            break
+
+    if duration is None:
+        match = DURATION_RE.search(remaining)
+        if match:
+            duration = _duration(match)
+            remaining = _cut(remaining, match)
+
+    candidates = [m for m in LOCATION_RE.finditer(remaining) if m.group(1).split()[0] not in NON_LOCATIONS]
+    match = next((m for m in candidates if m.group(1).lower() in KNOWN_LOCATIONS), None)
+    guessed = bool(candidates) and match is None
+    if match:
+        location = match.group(1)
+        remaining = _cut(remaining, match)
+    else:
+        lowered = remaining.lower()
+        for place in sorted(KNOWN_LOCATIONS, key=len, reverse=True):
+            found = re.search(rf"\b{re.escape(place)}\b", lowered)
+            if found:
+                location = remaining[found.start():found.end()].title()
+                remaining = remaining[:found.start()] + " " + remaining[found.end():]
+                break
+
+    words = WORD_RE.findall(remaining.lower())
+    core = [w for w in words if w not in FILLER_WORDS]
+    procedure = " ".join(core) or None
+
+    confidence = 1.0
+    if not core:
+        confidence = 0.0
+    elif len(core) > 10:
+        confidence = 0.4
+    elif any(w in VAGUE_WORDS for w in words) and len(core) < 2:
+        confidence = 0.3
+    elif len(re.findall(r"[?;]", text)) > 1:
+        confidence = 0.5
+    if guessed and location is None:
+        confidence = min(confidence, GUESSED_LOCATION_CONFIDENCE)
+
+    return query(age=age, procedure=procedure, Location=location, duration=duration), confidence
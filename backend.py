@@ -1,24 +1,72 @@
 import os
+import json
+import time
+import uuid
+import asyncio
+import contextvars
 import tempfile
-import logging
-import requests
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Union
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from fetcher import fetcher, DocumentTooLarge
+from jobs import job_queue, QueueFull
+from logs.metrics import registry, span, start_request_timings
+from logs.logging_config import logger, request_id
 
 from fastapi import (
     FastAPI, File, UploadFile, Form, HTTPException,
-    Depends, APIRouter, Body
+    Depends, APIRouter, Body, Request
 )
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-# ---------------- Logging Setup ----------------
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# ---------------- Executor Setup ----------------
+# Pipeline runs hold a worker for minutes; small file I/O goes through run_in_threadpool instead.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+async def run_blocking(func, *args):
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(pipeline_executor, partial(context.run, func, *args))
+
+# ---------------- Warm-up ----------------
+def warm_up():
+    import pdfplumber
+    import langchain.retrievers
+    import llm
+    from lang import get_graph
+    from RAG.embedding import default_backend, default_cache
+
+    get_graph()
+    default_backend()
+    default_cache()
+    logger.info(f"Warm-up complete (model: {llm.model.model_name})")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.warmup = asyncio.create_task(run_blocking(warm_up))
+    yield
+    await fetcher.aclose()
+    job_queue.shutdown()
+    pipeline_executor.shutdown(wait=False, cancel_futures=True)
+
+async def wait_until_ready():
+    try:
+        await asyncio.shield(app.state.warmup)
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        raise HTTPException(status_code=503, detail=f"Service not ready: {e}")
 
 # ---------------- FastAPI Setup ----------------
-app = FastAPI(title="Document Summarizer API", version="1.0.0")
+app = FastAPI(title="Document Summarizer API", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,6 +76,17 @@ app.add_middleware(
 )
 router = APIRouter(prefix="/api/v1")
 
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    rid = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = request_id.set(rid)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
+
 # ---------------- Auth Setup ----------------
 security = HTTPBearer()
 VALID_TOKEN = os.getenv("EXPECTED_TOKEN") or "ff30391fef089ed361c4fd740566e8787e0b74f81be7deba92aedfb92a4a7af9"
@@ -42,6 +101,15 @@ class HackRxRequest(BaseModel):
     documents: str
     questions: List[str]
 
+class CorpusDocument(BaseModel):
+    documents: str
+    doc_id: Optional[str] = None
+    metadata: Dict[str, str] = {}
+
+class CorpusQuery(BaseModel):
+    questions: List[str]
+    filters: Dict[str, Union[str, List[str]]] = {}
+
 # ---------------- Utilities ----------------
 def parse_input(input_text: str) -> List[str]:
     text = input_text.strip()
@@ -53,31 +121,101 @@ def parse_input(input_text: str) -> List[str]:
             logger.warning(f"List parse failed, fallback to comma split: {e}")
     return [q.strip() for q in input_text.split(",") if q.strip()]
 
-def process_request(input_text: List[str], file: UploadFile):
+async def save_upload(file: UploadFile) -> Path:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        while chunk := await file.read(1 << 20):
+            await run_in_threadpool(temp_file.write, chunk)
+        return Path(temp_file.name)
+
+def run_pipeline(input_text: List[str], file_path: Path, doc_name: str = None, doc_hash: str = None,
+                 latency_budget: float = None):
+    from pydantic_models import state
+    from lang import get_graph
+
+    request_state = state(input=input_text, file_path=file_path, doc_name=doc_name, doc_hash=doc_hash,
+                          latency_budget=latency_budget)
+    graph = get_graph()
+    result = graph.invoke(request_state)
+    return result.get("rag_ans", [])
+
+async def fetch_document(url: str) -> Path:
     try:
-        from pydantic_models import state
-        from lang import build_graph
+        with span("fetch"):
+            return await fetcher.fetch(url)
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        raise HTTPException(status_code=400, detail=f"Failed to fetch PDF from URL: {e}")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(file.file.read())
-            temp_file.flush()
-            temp_path = Path(temp_file.name)
+async def process_request(input_text: List[str], file_path: Path, doc_name: str = None, latency_budget: float = None):
+    await wait_until_ready()
+    try:
+        return await run_blocking(partial(run_pipeline, latency_budget=latency_budget), input_text, file_path, doc_name)
+    except Exception as e:
+        logger.error(f"Processing error: {e}")
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+def run_job(input_text: List[str], file_path: Path, doc_name: str, doc_hash: str, cleanup: bool):
+    try:
+        return run_pipeline(input_text, file_path, doc_name, doc_hash)
+    finally:
+        if cleanup and file_path.exists():
+            os.unlink(file_path)
+
+async def submit_job(input_text: List[str], file_path: Path, doc_name: str, cleanup: bool = False):
+    from RAG.index_store import file_hash
+
+    discard = partial(file_path.unlink, missing_ok=True) if cleanup else None
+    try:
+        await wait_until_ready()
+        doc_hash = await run_in_threadpool(file_hash, file_path)
+    except BaseException:
+        if discard:
+            discard()
+        raise
+    try:
+        job = job_queue.submit(run_job, input_text, file_path, doc_name, doc_hash, cleanup,
+                               key=(doc_hash, tuple(input_text)), on_duplicate=discard)
+    except QueueFull as e:
+        if discard:
+            discard()
+        raise HTTPException(status_code=429, detail=f"Job queue is full: {e}")
+    return job.describe()
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_request(input_text: List[str], file_path: Path, doc_name: str = None, cleanup: bool = False,
+                         latency_budget: float = None):
+    from pydantic_models import state
+    from lang import iter_pipeline
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    start = time.perf_counter()
+
+    def produce():
         try:
-            request_state = state(input=input_text, file_path=temp_path)
-            graph = build_graph()
-            result = graph.invoke(request_state)
-            return result.get("rag_ans", [])
+            request_state = state(input=input_text, file_path=file_path, doc_name=doc_name, latency_budget=latency_budget)
+            for i, answer in iter_pipeline(request_state):
+                item = {"index": i, "question": input_text[i], "answer": answer,
+                        "seconds": round(time.perf_counter() - start, 3)}
+                loop.call_soon_threadsafe(events.put_nowait, ("answer", item))
         except Exception as e:
-            logger.error(f"Processing error: {e}")
-            raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+            logger.error(f"Streaming error: {e}")
+            loop.call_soon_threadsafe(events.put_nowait, ("error", {"detail": f"Processing failed: {str(e)}"}))
         finally:
-            if temp_path.exists():
-                os.unlink(temp_path)
+            loop.call_soon_threadsafe(events.put_nowait, None)
+            if cleanup and file_path.exists():
+                os.unlink(file_path)
 
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    producer = asyncio.create_task(run_blocking(produce))
+    answered = 0
+    while (event := await events.get()) is not None:
+        answered += event[0] == "answer"
+        yield sse(*event)
+    await producer
+    yield sse("done", {"answers": answered, "questions": len(input_text), "seconds": round(time.perf_counter() - start, 3)})
 
 # ---------------- Endpoints ----------------
 @router.get("/", tags=["Health Check"])
@@ -88,39 +226,154 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+@router.get("/ready", tags=["Health Check"])
+def readiness_check():
+    warmup = app.state.warmup
+    if not warmup.done():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    error = "cancelled" if warmup.cancelled() else warmup.exception()
+    if error:
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": str(error)})
+    return {"status": "ready"}
+
+@router.get("/metrics", tags=["Health Check"])
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @router.post("/summarize", tags=["Summarization"])
-async def summarizer(input_text: str = Form(...), file: UploadFile = File(...)):
+async def summarizer(input_text: str = Form(...), file: UploadFile = File(...), timings: bool = False,
+                     latency_budget: Optional[float] = None):
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
+    spans = start_request_timings()
     parsed_questions = parse_input(input_text)
-    result = process_request(parsed_questions, file)
-    return {"result": result}
+    try:
+        temp_path = await save_upload(file)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/hackrx/run", tags=["HackRx"], dependencies=[Depends(verify_token)])
-async def hackrx_run_json(payload: HackRxRequest = Body(...)):
     try:
-        response = requests.get(payload.documents)
-        response.raise_for_status()
+        with span("request", questions=len(parsed_questions)):
+            result = await process_request(parsed_questions, temp_path, file.filename, latency_budget)
+    finally:
+        if temp_path.exists():
+            os.unlink(temp_path)
+    return {"result": result, "timings": spans} if timings else {"result": result}
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(response.content)
-            temp_file.flush()
-            temp_path = Path(temp_file.name)
+@router.post("/hackrx/run", tags=["HackRx"], dependencies=[Depends(verify_token)])
+async def hackrx_run_json(payload: HackRxRequest = Body(...), timings: bool = False,
+                          latency_budget: Optional[float] = None):
+    spans = start_request_timings()
+    file_path = await fetch_document(payload.documents)
 
-        with open(temp_path, "rb") as f:
-            upload_file = UploadFile(filename="file.pdf", file=f)
-            result = process_request(payload.questions, upload_file)
+    try:
+        with span("request", questions=len(payload.questions)):
+            result = await process_request(payload.questions, file_path, payload.documents.split("?")[0], latency_budget)
+    finally:
+        file_path.unlink(missing_ok=True)
+    return {"answers": result, "timings": spans} if timings else {"answers": result}
 
-        return {"answers": result}
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch PDF from URL: {e}")
+@router.post("/corpus/documents", tags=["Corpus"], dependencies=[Depends(verify_token)])
+async def corpus_register(payload: CorpusDocument = Body(...)):
+    from RAG.corpus import corpus
+
+    file_path = await fetch_document(payload.documents)
+    doc_id = payload.doc_id or payload.documents.split("?")[0]
+    try:
+        await wait_until_ready()
+        return await run_blocking(corpus.register, doc_id, file_path, payload.metadata)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"HackRX processing error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Corpus registration error: {e}")
+        raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
     finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        file_path.unlink(missing_ok=True)
+
+@router.get("/corpus/documents", tags=["Corpus"], dependencies=[Depends(verify_token)])
+def corpus_list(request: Request):
+    from RAG.corpus import corpus
+
+    return {"documents": corpus.select(dict(request.query_params))}
+
+@router.delete("/corpus/documents/{doc_id:path}", tags=["Corpus"], dependencies=[Depends(verify_token)])
+def corpus_remove(doc_id: str):
+    from RAG.corpus import corpus
+
+    if not corpus.remove(doc_id):
+        raise HTTPException(status_code=404, detail=f"Unknown corpus document: {doc_id}")
+    return {"removed": doc_id}
+
+@router.post("/corpus/query", tags=["Corpus"], dependencies=[Depends(verify_token)])
+async def corpus_query(payload: CorpusQuery = Body(...), timings: bool = False):
+    from RAG.corpus import corpus, NoMatchingDocuments
+
+    spans = start_request_timings()
+    await wait_until_ready()
+    try:
+        with span("request", questions=len(payload.questions)):
+            result = await run_blocking(corpus.answer, payload.questions, payload.filters)
+    except NoMatchingDocuments as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Corpus query error: {e}")
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    return {**result, "timings": spans} if timings else result
+
+@router.post("/jobs/summarize", tags=["Jobs"], status_code=202)
+async def summarize_job(input_text: str = Form(...), file: UploadFile = File(...)):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    await wait_until_ready()
+    temp_path = await save_upload(file)
+    return await submit_job(parse_input(input_text), temp_path, file.filename, cleanup=True)
+
+@router.post("/hackrx/jobs", tags=["Jobs"], status_code=202, dependencies=[Depends(verify_token)])
+async def hackrx_job(payload: HackRxRequest = Body(...)):
+    await wait_until_ready()
+    file_path = await fetch_document(payload.documents)
+    return await submit_job(payload.questions, file_path, payload.documents.split("?")[0], cleanup=True)
+
+@router.get("/jobs/{job_id}", tags=["Jobs"])
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.describe()
+
+@router.get("/jobs/{job_id}/result", tags=["Jobs"])
+def job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if not job.done:
+        return JSONResponse(status_code=202, content=job.describe())
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Processing failed: {job.error}")
+    return {"result": job.result}
+
+@router.post("/summarize/stream", tags=["Summarization"])
+async def summarizer_stream(input_text: str = Form(...), file: UploadFile = File(...),
+                            latency_budget: Optional[float] = None):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    await wait_until_ready()
+    temp_path = await save_upload(file)
+    return StreamingResponse(stream_request(parse_input(input_text), temp_path, file.filename, cleanup=True,
+                                            latency_budget=latency_budget),
+                             media_type="text/event-stream")
+
+@router.post("/hackrx/run/stream", tags=["HackRx"], dependencies=[Depends(verify_token)])
+async def hackrx_run_stream(payload: HackRxRequest = Body(...), latency_budget: Optional[float] = None):
+    await wait_until_ready()
+    file_path = await fetch_document(payload.documents)
+    return StreamingResponse(stream_request(payload.questions, file_path, payload.documents.split("?")[0], cleanup=True,
+                                            latency_budget=latency_budget),
+                             media_type="text/event-stream")
 
 # ---------------- Register Router ----------------
 app.include_router(router)
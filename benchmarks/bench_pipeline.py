@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+QUESTIONS = [
+    "What is the grace period for premium payment?",
+    "What is the waiting period for pre-existing diseases?",
+    "Does this policy cover maternity expenses?",
+    "What is the waiting period for cataract surgery?",
+    "Are medical expenses for an organ donor covered?",
+    "What is the No Claim Discount offered?",
+    "Is there a benefit for preventive health check-ups?",
+    "How does the policy define a Hospital?",
+    "What is the extent of coverage for AYUSH treatments?",
+    "Are there any sub-limits on room rent and ICU charges?",
+]
+
+def configure_offline(workdir: Path, llm_latency: float):
+    os.environ.update({
+        "EMBEDDING_BACKEND": "fake",
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(llm_latency),
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "offline"),
+        "GROQ_RPM": "0",
+        "GROQ_TPM": "0",
+        "ANSWER_CACHE_MAX_ENTRIES": "0",
+        "INDEX_STORE_DIR": str(workdir / "index_store"),
+        "EMBED_CACHE_PATH": str(workdir / "embedding_cache" / "embeddings.sqlite3"),
+        "FETCH_CACHE_DIR": str(workdir / "fetch_cache"),
+        "LOG_DIR": str(workdir / "logs"),
+    })
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def summarize_spans(spans) -> tuple:
+    stages, annotations = {}, {}
+    for entry in spans:
+        fields = {k: v for k, v in entry.items() if k not in ("span", "seconds")}
+        if "seconds" not in entry:
+            annotations[entry["span"]] = fields
+            continue
+        stage = stages.setdefault(entry["span"], {"seconds": 0.0, "calls": 0})
+        stage["seconds"] = round(stage["seconds"] + entry["seconds"], 6)
+        stage["calls"] += 1
+        for key, value in fields.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stage[key] = stage.get(key, 0) + value
+    return stages, annotations
+
+def bench_workloads(pdf: Path, questions) -> dict:
+    from lang import get_graph
+    from pydantic_models import state
+    from logs.metrics import start_request_timings
+
+    graph = get_graph()
+    workloads = {
+        "cold_single": questions[:1],
+        "warm_single": questions[1:2],
+        "warm_multi": questions,
+    }
+    results = {}
+    for name, batch in workloads.items():
+        spans = start_request_timings()
+        start = time.perf_counter()
+        output = graph.invoke(state(input=batch, file_path=pdf, doc_name=pdf.name))
+        seconds = time.perf_counter() - start
+        stages, annotations = summarize_spans(spans)
+        results[name] = {
+            "questions": len(batch),
+            "answers": len(output.get("rag_ans") or []),
+            "seconds": round(seconds, 6),
+            "questions_per_second": round(len(batch) / seconds, 3) if seconds else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "plan": annotations.get("retrieval_plan", {}).get("plan"),
+            "stages": stages,
+            "annotations": annotations,
+        }
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def compare(current: dict, baseline: dict):
+    previous = {d["name"]: d for d in baseline.get("documents", [])}
+    print(f"{'document':<12}{'measurement':<36}{'baseline s':>12}{'current s':>12}{'delta':>9}")
+    for doc in current["documents"]:
+        old = previous.get(doc["name"])
+        if not old:
+            continue
+        rows = []
+        for name, workload in doc["workloads"].items():
+            base_workload = old["workloads"].get(name) or {}
+            rows.append((name, workload, base_workload))
+            rows += [(f"{name}:{k}", v, base_workload.get("stages", {}).get(k)) for k, v in workload["stages"].items()]
+        for label, new, base in rows:
+            if not base or not base["seconds"]:
+                continue
+            delta = (new["seconds"] - base["seconds"]) / base["seconds"] * 100
+            print(f"{doc['name']:<12}{label:<36}{base['seconds']:>12.4f}{new['seconds']:>12.4f}{delta:>8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the RAG pipeline.")
+    parser.add_argument("--docs", nargs="*", default=sorted(str(p) for p in (ROOT / "test").glob("DOC*.pdf")))
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS))
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="mediclaim-bench-"))
+    configure_offline(workdir, args.llm_latency)
+    questions = QUESTIONS[:max(1, args.questions)]
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "questions": len(questions),
+            "llm_latency": args.llm_latency,
+        },
+        "documents": [],
+    }
+    for doc in args.docs:
+        pdf = Path(doc).resolve()
+        print(f"Benchmarking {pdf.name} ...", flush=True)
+        result = {"name": pdf.name, "bytes": pdf.stat().st_size}
+        result["workloads"] = bench_workloads(pdf, questions)
+        report["documents"].append(result)
+
+    report["meta"]["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
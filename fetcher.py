@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional
+import httpx
+from logs.logging_config import logger
+
+FETCH_CACHE_DIR = os.getenv("FETCH_CACHE_DIR", "fetch_cache")
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(50 * 1024 ** 2)))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "60"))
+FETCH_CACHE_MAX_ENTRIES = int(os.getenv("FETCH_CACHE_MAX_ENTRIES", "500"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+
+REQUESTS_DIR = "requests"
+STALE_REQUEST_SECONDS = 3600
+
+class DocumentTooLarge(Exception):
+    pass
+
+def mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+class DocumentFetcher:
+    def __init__(self, cache_dir: str = FETCH_CACHE_DIR, max_bytes: int = FETCH_MAX_BYTES,
+                 timeout: float = FETCH_TIMEOUT, max_entries: int = FETCH_CACHE_MAX_ENTRIES,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / REQUESTS_DIR).mkdir(exist_ok=True)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._client = client
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS,
+                                    max_keepalive_connections=FETCH_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.bin", self.cache_dir / f"{key}.json"
+
+    def _read_meta(self, body: Path, meta_path: Path) -> dict:
+        if not body.exists():
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def checkout(self, body: Path) -> Path:
+        # Callers get their own link to the cached bytes, so a refetch or eviction cannot change them mid-request.
+        copy = self.cache_dir / REQUESTS_DIR / f"{uuid.uuid4().hex}.pdf"
+        try:
+            os.link(body, copy)
+        except OSError:
+            shutil.copyfile(body, copy)
+        return copy
+
+    async def fetch(self, url: str) -> Path:
+        body, meta_path = self._paths(url)
+        meta = self._read_meta(body, meta_path)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with self.client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and meta:
+                os.utime(body)
+                logger.debug(f"Document not modified, using cached copy of {url}")
+                return self.checkout(body)
+            response.raise_for_status()
+
+            length = response.headers.get("content-length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise DocumentTooLarge(f"Document is {length} bytes, limit is {self.max_bytes}")
+
+            partial = body.with_name(f"{body.name}.{uuid.uuid4().hex}.part")
+            size = 0
+            try:
+                with open(partial, "wb") as f:
+                    async for block in response.aiter_bytes(1 << 16):
+                        size += len(block)
+                        if size > self.max_bytes:
+                            raise DocumentTooLarge(f"Document exceeds limit of {self.max_bytes} bytes")
+                        f.write(block)
+                os.replace(partial, body)
+            finally:
+                if partial.exists():
+                    partial.unlink()
+
+            meta = {
+                "url": url,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "bytes": size,
+                "fetched": time.time(),
+            }
+
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        logger.info(f"Fetched {size} bytes from {url}")
+        copy = self.checkout(body)
+        self.evict(keep=body)
+        return copy
+
+    def evict(self, keep: Optional[Path] = None):
+        bodies = sorted(self.cache_dir.glob("*.bin"), key=mtime)
+        for body in bodies[:max(0, len(bodies) - self.max_entries)]:
+            if body == keep:
+                continue
+            body.unlink(missing_ok=True)
+            body.with_suffix(".json").unlink(missing_ok=True)
+        cutoff = time.time() - STALE_REQUEST_SECONDS
+        for copy in (self.cache_dir / REQUESTS_DIR).glob("*.pdf"):
+            if mtime(copy) < cutoff:
+                copy.unlink(missing_ok=True)
+
+fetcher = DocumentFetcher()
@@ -0,0 +1,107 @@
+import os
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from logs.logging_config import logger
+from logs.metrics import registry, span
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+class QueueFull(Exception):
+    pass
+
+class Job:
+    def __init__(self, key: Optional[Hashable] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING, ttl: float = JOB_TTL):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.jobs: Dict[str, Job] = {}
+        self.in_flight: Dict[Hashable, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def submit(self, func: Callable, *args, key: Optional[Hashable] = None, on_duplicate: Callable = None) -> Job:
+        with self._lock:
+            self._expire()
+            existing = self.in_flight.get(key) if key is not None else None
+            if existing is not None:
+                logger.info(f"Coalesced submission into in-flight job {existing.id}")
+                if on_duplicate:
+                    on_duplicate()
+                return existing
+            if sum(not job.done for job in self.jobs.values()) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            job = Job(key)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.in_flight[key] = job
+        self._executor.submit(contextvars.copy_context().run, self._run, job, func, *args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: Job, func: Callable, *args):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            with span("job", queued_seconds=round(job.started - job.created, 3)):
+                job.result = func(*args)
+            job.status = "done"
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if job.key is not None and self.in_flight.get(job.key) is job:
+                    del self.in_flight[job.key]
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+job_queue = JobQueue()
+registry.gauge("mediclaim_jobs", "Background jobs by status.", job_queue.stats, label="status")
@@ -1,7 +1,9 @@
+import threading
 from langgraph.graph import StateGraph
-from RAG.database import vector_Search
+from RAG.database import vector_Search, iter_answers
 from agents.query_generator import query_generator
 from pydantic_models import state
+from logs.metrics import traced
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,17 +11,31 @@ load_dotenv()
 
 def build_graph():
     graph = StateGraph(state)
-    graph.add_node("query_generator", query_generator)
-    graph.add_node("vector_search", vector_Search)
+    graph.add_node("query_generator", traced("query_generator", query_generator))
+    graph.add_node("vector_search", traced("vector_search", vector_Search))
     graph.set_entry_point("query_generator")
     graph.add_edge("query_generator", "vector_search")
     graph.set_finish_point("vector_search")
     return graph.compile()
 
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = build_graph()
+        return _graph
+
+def iter_pipeline(st: state):
+    st = traced("query_generator", query_generator)(st)
+    yield from iter_answers(st)
+
 def process_questions(questions, file_path: str):
     single_question = isinstance(questions, str)
     questions_list = [questions] if single_question else questions
-    app = build_graph()
+    app = get_graph()
 
     initial_state = state(
         input=questions_list,
@@ -27,13 +43,13 @@ def process_questions(questions, file_path: str):
     )
 
     try:
-        result = app.invoke(initial_state)
+        rag_ans = app.invoke(initial_state).get("rag_ans")
         if single_question:
-            return result.rag_ans[0] if isinstance(result.rag_ans, list) else result.rag_ans
+            return rag_ans[0] if isinstance(rag_ans, list) else rag_ans
         else:
             return [
                 f"**Question {i}:** {questions_list[i-1]}\n\n**Answer {i}:** {answer}\n"
-                for i, answer in enumerate(result.rag_ans or [], 1)
+                for i, answer in enumerate(rag_ans or [], 1)
             ]
     except Exception as e:
         return (
@@ -1,4 +1,47 @@
+import os
+import re
+import time
+import threading
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
 from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.language_models.chat_models import BaseChatModel
 from dotenv import load_dotenv
 load_dotenv()
-model=ChatGroq(model_name="llama3-70b-8192")
\ No newline at end of file
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake-chat"
+    latency: float = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+    rate_limit_every: int = 0
+    _calls: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        with self._lock:
+            self._calls += 1
+            calls = self._calls
+        if self.rate_limit_every and calls % self.rate_limit_every == 0:
+            raise FakeRateLimitError("Error code: 429 - rate limit exceeded (fake)")
+        time.sleep(self.latency)
+        prompt = "\n".join(str(m.content) for m in messages)
+        words = re.findall(r"\w+", prompt.split("**CONTEXT:**")[-1])
+        answer = " ".join(words[:40])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer))])
+
+model = FakeChatModel() if LLM_BACKEND == "fake" else ChatGroq(model_name="llama3-70b-8192")
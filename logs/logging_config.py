@@ -1,21 +1,110 @@
-import logging
 import os
+import json
+import queue
+import atexit
+import random
+import logging
+import multiprocessing
+from datetime import datetime, timezone
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from logs.metrics import registry
 
-log_dir = "logs"
+log_dir = os.getenv("LOG_DIR", "logs")
 os.makedirs(log_dir, exist_ok=True)
 
-logger = logging.getLogger("log")
-logger.setLevel(logging.DEBUG)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 ** 2)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = {
+    logging.DEBUG: float(os.getenv("LOG_SAMPLE_DEBUG", "1.0")),
+    logging.INFO: float(os.getenv("LOG_SAMPLE_INFO", "1.0")),
+}
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
 
-file_handler = logging.FileHandler(os.path.join(log_dir, "app.log"))
-file_handler.setLevel(logging.DEBUG)
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s')
+
+console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
+
+# RotatingFileHandler is not multi-process safe, so each process rotates its own file: the main process
+# writes app.log, child processes (uvicorn --workers / --reload) write app.<pid>.log.
+log_file = "app.log" if multiprocessing.parent_process() is None else f"app.{os.getpid()}.log"
+file_handler = RotatingFileHandler(os.path.join(log_dir, log_file), maxBytes=LOG_MAX_BYTES,
+                                   backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
 file_handler.setFormatter(formatter)
+handlers = [console_handler, file_handler]
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+sampling_filter = SamplingFilter(LOG_SAMPLE_RATES)
+queue_handler = DroppingQueueHandler(log_queue)
+queue_handler.addFilter(sampling_filter)
+queue_handler.addFilter(RequestIdFilter())
+
+listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+def console_only():
+    listener.handlers = (console_handler,)
+    file_handler.close()
+
+logger = logging.getLogger("log")
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+logger.addHandler(queue_handler)
 
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+registry.gauge(
+    "mediclaim_log_records",
+    "Log records discarded before reaching a handler.",
+    lambda: {"dropped": queue_handler.dropped, "sampled_out": sampling_filter.sampled_out},
+)
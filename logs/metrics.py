@@ -0,0 +1,152 @@
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, observed = self.series.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[key] = (counts, total + value, observed + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, observed) in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{format_labels(key + (('le', '+Inf'),))} {observed}")
+                lines.append(f"{self.name}_sum{format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{format_labels(key)} {observed}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines += [f"{self.name}{format_labels(key)} {value}" for key, value in sorted(self.series.items())]
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[str, float]], label: str):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.label = label
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{format_labels(((self.label, k),))} {v}" for k, v in sorted(self.collect().items())]
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, factory):
+        with self._lock:
+            if name not in self.metrics:
+                self.metrics[name] = factory()
+            return self.metrics[name]
+
+    def histogram(self, name: str, help: str) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help))
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(name, lambda: Counter(name, help))
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Dict[str, float]], label: str = "kind") -> Gauge:
+        return self._register(name, lambda: Gauge(name, help, collect, label))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+SPAN_SECONDS = registry.histogram("mediclaim_span_seconds", "Wall time of pipeline spans in seconds.")
+SPAN_ITEMS = registry.counter("mediclaim_span_items_total", "Items counted by pipeline spans (chunks, tokens, cache hits, ...).")
+SPAN_ERRORS = registry.counter("mediclaim_span_errors_total", "Pipeline spans that raised an exception.")
+
+_request_spans: ContextVar[Optional[list]] = ContextVar("request_spans", default=None)
+
+def start_request_timings() -> list:
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+def record(name: str, seconds: float, **counts):
+    SPAN_SECONDS.observe(seconds, span=name)
+    for item, value in counts.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            SPAN_ITEMS.inc(value, span=name, item=item)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append({"span": name, "seconds": round(seconds, 6), **counts})
+
+def annotate(name: str, **fields):
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append({"span": name, **fields})
+
+def observed(name: str, per_item: Optional[str] = None) -> Optional[float]:
+    with SPAN_SECONDS._lock:
+        series = SPAN_SECONDS.series.get((("span", name),))
+    if not series:
+        return None
+    _, total, count = series
+    if per_item is None:
+        return total / count
+    with SPAN_ITEMS._lock:
+        items = SPAN_ITEMS.series.get((("item", per_item), ("span", name)))
+    return total / items if items else None
+
+@contextmanager
+def span(name: str, **counts):
+    start = time.perf_counter()
+    try:
+        yield counts
+    except Exception:
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        record(name, time.perf_counter() - start, **counts)
+
+def traced(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
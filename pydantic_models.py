@@ -12,6 +12,9 @@ class query(BaseModel):
     Location: Optional[str] = Field(None, description="Location of the claimant.")
     duration: Optional[str] = Field(None, description="Duration or validity period of the insurance policy.")
 
+class queries(BaseModel):
+    items: List[query] = Field(description="One structured query per user input, in the same order as the inputs.")
+
 class PolicyDecision(BaseModel):
     decision: str = Field(description="The final decision: Approved, Rejected, or Pending.", enum=["Approved", "Rejected", "Pending"])
     approved_amount: Union[int, str] = Field(description="The final approved payout amount in USD. Should be 'NA' if the claim is not approved or if no specific amount is mentioned.")
@@ -20,6 +23,9 @@ class PolicyDecision(BaseModel):
 class state(BaseModel):
     input: Optional[List[str]] = Field(default=None, description="List of user's text input queries.")
     file_path: Optional[Path] = Field(default=None, description="Path to the uploaded PDF or TXT document.")
+    doc_name: Optional[str] = Field(default=None, description="Original file name or URL of the document, stored as chunk source.")
+    doc_hash: Optional[str] = Field(default=None, description="SHA-256 hash of the document bytes, used as the index cache key.")
+    latency_budget: Optional[float] = Field(default=None, description="Optional per-request latency budget in seconds used by the retrieval planner.")
     rag_ans: Optional[List[str]] = Field(default=None, description="List of responses generated by RAG agent for each question.")
     source: Optional[List[str]] = Field(default=None, description="Sources used to generate the RAG response.")
     url: Optional[Path] = Field(default=None, description="Cloudinary URL of the stored database or index file.")
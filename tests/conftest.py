@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="mediclaim-tests-")
+os.environ.setdefault("LOG_DIR", os.path.join(_scratch, "logs"))
+os.environ.setdefault("INDEX_STORE_DIR", os.path.join(_scratch, "index_store"))
+os.environ.setdefault("EMBED_CACHE_PATH", os.path.join(_scratch, "embedding_cache", "embeddings.sqlite3"))
+os.environ.setdefault("FETCH_CACHE_DIR", os.path.join(_scratch, "fetch_cache"))
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("GROQ_RPM", "0")
+os.environ.setdefault("GROQ_TPM", "0")
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+import io
+import asyncio
+import threading
+from fastapi import UploadFile
+import backend
+
+def test_upload_is_written_while_pipeline_workers_are_busy():
+    release = threading.Event()
+
+    async def scenario():
+        busy = [asyncio.ensure_future(backend.run_blocking(release.wait)) for _ in range(backend.PIPELINE_WORKERS)]
+        try:
+            upload = UploadFile(io.BytesIO(b"%PDF-1.4 test"), filename="policy.pdf")
+            path = await asyncio.wait_for(backend.save_upload(upload), timeout=10)
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+        return path
+
+    path = asyncio.run(scenario())
+    try:
+        assert path.read_bytes() == b"%PDF-1.4 test"
+    finally:
+        path.unlink()
+
+def test_malformed_document_url_is_a_client_error():
+    from fastapi.testclient import TestClient
+
+    with TestClient(backend.app) as client:
+        response = client.post("/api/v1/hackrx/run", json={"documents": "http://[::1", "questions": ["q"]},
+                               headers={"Authorization": f"Bearer {backend.VALID_TOKEN}"})
+    assert response.status_code == 400
+
+def test_submit_job_removes_the_request_copy_when_hashing_fails(tmp_path, monkeypatch):
+    import pytest
+    from RAG import index_store
+
+    def broken_hash(path):
+        raise OSError("disk error")
+
+    async def ready():
+        return None
+
+    monkeypatch.setattr(index_store, "file_hash", broken_hash)
+    monkeypatch.setattr(backend, "wait_until_ready", ready)
+    path = tmp_path / "request.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    with pytest.raises(OSError):
+        asyncio.run(backend.submit_job(["q"], path, "doc", cleanup=True))
+    assert not path.exists()
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from RAG import corpus as corpus_module
+from RAG.corpus import Corpus
+
+def test_concurrent_registrations_are_all_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_module, "file_hash", lambda path: f"hash-{path}")
+    monkeypatch.setattr(corpus_module, "load_or_build_index", lambda *args, **kwargs: [])
+    monkeypatch.setattr(corpus_module.index_store, "pin", lambda *args, **kwargs: None)
+
+    path = tmp_path / "corpus.json"
+    workers = [Corpus(path), Corpus(path)]
+    barrier = threading.Barrier(len(workers))
+
+    def register(i, corpus):
+        barrier.wait()
+        for n in range(20):
+            corpus.register(f"policy-{i}-{n}", f"doc-{i}-{n}", embedding=object())
+
+    threads = [threading.Thread(target=register, args=(i, c)) for i, c in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(Corpus(path).select()) == 40
+
+def test_answer_without_matching_documents_skips_the_llm(tmp_path, monkeypatch):
+    from RAG.corpus import NoMatchingDocuments
+
+    def generate_answers(*args):
+        raise AssertionError("LLM called without context")
+
+    monkeypatch.setattr(corpus_module, "generate_answers", generate_answers)
+    corpus = Corpus(tmp_path / "corpus.json")
+    corpus.entries = {"policy-1": {"doc_id": "policy-1", "doc_hash": "h", "metadata": {"insurer": "acme"}}}
+    with pytest.raises(NoMatchingDocuments):
+        corpus.answer(["What is the grace period?"], {"insurer": "Z"})
+
+def test_shard_searches_run_in_the_request_context(tmp_path, monkeypatch):
+    import numpy as np
+    from logs.logging_config import request_id
+
+    seen = []
+
+    class FakeIndex:
+        def search(self, queries, k):
+            seen.append(request_id.get())
+            return [[] for _ in queries]
+
+    class FakeShard:
+        doc_id = "policy-1"
+        vectors = bm25 = FakeIndex()
+
+    corpus = Corpus(tmp_path / "corpus.json")
+    monkeypatch.setattr(corpus, "shard", lambda entry: FakeShard())
+    token = request_id.set("req-123")
+    try:
+        corpus.search(["grace period"], [np.zeros(4)], [{"doc_id": "policy-1"}, {"doc_id": "policy-2"}])
+    finally:
+        request_id.reset(token)
+    assert seen == ["req-123"] * 4
@@ -0,0 +1,21 @@
+import asyncio
+import httpx
+from fetcher import DocumentFetcher
+
+def test_each_fetch_gets_a_private_copy(tmp_path):
+    versions = iter([b"%PDF-1.4 first", b"%PDF-1.4 second"])
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=next(versions)))
+    fetcher = DocumentFetcher(cache_dir=tmp_path, max_entries=0, client=httpx.AsyncClient(transport=transport))
+
+    async def scenario():
+        first = await fetcher.fetch("https://example.com/policy.pdf")
+        second = await fetcher.fetch("https://example.com/policy.pdf")
+        fetcher.evict()
+        await fetcher.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first != second
+    assert first.read_bytes() == b"%PDF-1.4 first"
+    assert second.read_bytes() == b"%PDF-1.4 second"
+    assert not list(tmp_path.glob("*.bin"))
@@ -0,0 +1,93 @@
+import os
+import time
+import threading
+from pathlib import Path
+import pytest
+from RAG.index_store import IndexStore, META_FILE
+
+DOCS = Path(__file__).resolve().parent.parent / "test"
+
+def publish(store, doc_hash, size=100, age=0.0, **meta):
+    staging = store.staging(doc_hash)
+    (staging / "data.bin").write_bytes(b"x" * size)
+    store.publish(doc_hash, staging, **meta)
+    used = time.time() - age
+    os.utime(store.path(doc_hash) / META_FILE, (used, used))
+
+def stored(store):
+    return sorted(m["doc_hash"] for m in store.entries())
+
+def run_with_timeout(func, timeout=30.0):
+    errors = []
+    def target():
+        try:
+            func()
+        except BaseException as e:
+            errors.append(e)
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "index store operation did not finish (deadlock?)"
+    if errors:
+        raise errors[0]
+
+def test_entry_limit_evicts_least_recently_used(tmp_path):
+    store = IndexStore(tmp_path, max_entries=2)
+    def fill():
+        publish(store, "a", age=30)
+        publish(store, "b", age=20)
+        publish(store, "c", age=10)
+    run_with_timeout(fill)
+    assert stored(store) == ["b", "c"]
+
+def test_byte_limit_evicts_until_under_budget(tmp_path):
+    store = IndexStore(tmp_path, max_entries=100, max_bytes=2500)
+    publish(store, "a", size=1000, age=30)
+    publish(store, "b", size=1000, age=20)
+    publish(store, "c", size=1000, age=10)
+    assert stored(store) == ["b", "c"]
+
+def test_keep_is_never_evicted(tmp_path):
+    store = IndexStore(tmp_path, max_entries=10)
+    publish(store, "a", age=30)
+    publish(store, "b", age=20)
+    publish(store, "c", age=10)
+    store.max_entries = 2
+    store.evict(keep="a")
+    assert stored(store) == ["a", "c"]
+
+def test_pinned_entries_are_skipped(tmp_path):
+    store = IndexStore(tmp_path, max_entries=10)
+    publish(store, "a", age=30, pinned=True)
+    publish(store, "b", age=20)
+    publish(store, "c", age=10)
+    store.max_entries = 1
+    store.evict()
+    assert stored(store) == ["a"]
+
+def test_superseded_entries_are_evicted_first(tmp_path):
+    store = IndexStore(tmp_path, max_entries=10)
+    publish(store, "a", age=30)
+    publish(store, "b", age=20)
+    publish(store, "c", age=1)
+    store.supersede("c", "d")
+    store.max_entries = 2
+    store.evict()
+    assert stored(store) == ["a", "b"]
+
+def test_building_past_max_entries_does_not_hang(tmp_path, monkeypatch):
+    from RAG import database
+    from RAG.embedding import GoogleEmbedding
+    from RAG.index_store import file_hash
+
+    store = IndexStore(tmp_path, max_entries=2)
+    monkeypatch.setattr(database, "index_store", store)
+    paths = [DOCS / name for name in ("DOC3.pdf", "DOC5.pdf", "DOC6.pdf")]
+
+    def build_all():
+        for path in paths:
+            database.load_or_build_index(file_hash(path), path, GoogleEmbedding(), source=path.stem)
+
+    run_with_timeout(build_all, timeout=300)
+    assert len(store.entries()) == 2
+    assert store.exists(file_hash(paths[-1]))
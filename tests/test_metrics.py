@@ -0,0 +1,37 @@
+from logs.metrics import SPAN_SECONDS, annotate, start_request_timings
+
+def test_annotate_adds_to_request_timings_without_observing_a_span():
+    spans = start_request_timings()
+    annotate("reindex", reused=3, embedded=1, tombstoned=0)
+    assert spans == [{"span": "reindex", "reused": 3, "embedded": 1, "tombstoned": 0}]
+    assert (("span", "reindex"),) not in SPAN_SECONDS.series
+
+def test_retrieval_threads_record_into_the_request_timings(monkeypatch, tmp_path):
+    from RAG import database
+    from pydantic_models import state
+    from RAG.index_store import IndexStore
+    from pathlib import Path
+
+    monkeypatch.setattr(database, "index_store", IndexStore(tmp_path))
+    monkeypatch.setattr(database, "plan_retrieval", lambda chunks, n, budget=None: {
+        "plan": "full", "reason": "test", "estimated_retrieval_seconds": 0, "estimated_answer_seconds": 0})
+    spans = start_request_timings()
+    pdf = Path(__file__).resolve().parent.parent / "test" / "DOC3.pdf"
+    st = state(input=["What is the grace period?"], file_path=pdf, doc_name="DOC3")
+    list(database.iter_answers(st))
+    assert "compression" in {entry["span"] for entry in spans}
+
+def test_vector_index_search_has_its_own_span(monkeypatch, tmp_path):
+    from RAG import database
+    from pydantic_models import state
+    from RAG.index_store import IndexStore
+    from pathlib import Path
+
+    monkeypatch.setattr(database, "index_store", IndexStore(tmp_path))
+    monkeypatch.setattr(database, "plan_retrieval", lambda chunks, n, budget=None: {
+        "plan": "hybrid", "reason": "test", "estimated_retrieval_seconds": 0, "estimated_answer_seconds": 0})
+    spans = start_request_timings()
+    pdf = Path(__file__).resolve().parent.parent / "test" / "DOC3.pdf"
+    list(database.iter_answers(state(input=["What is the grace period?"], file_path=pdf, doc_name="DOC3")))
+    names = [entry["span"] for entry in spans]
+    assert "vector_index" in names and "vector_search" not in names
@@ -0,0 +1,14 @@
+from agents import query_generator
+
+def test_llm_fallback_goes_through_the_rate_limited_scheduler(monkeypatch):
+    calls = []
+    real_run = query_generator.answer_scheduler.run
+
+    def run(func, *args, **kwargs):
+        calls.append(kwargs)
+        return real_run(func, *args, **kwargs)
+
+    monkeypatch.setattr(query_generator.answer_scheduler, "run", run)
+    items = query_generator.llm_extract(["hmm", "what about that thing"])
+    assert len(items) == 2
+    assert calls and calls[0]["tokens"] > 0 and calls[0]["span_name"] == "llm_query_generator"
@@ -0,0 +1,19 @@
+import pytest
+from agents.query_generator import QUERY_LOCAL_CONFIDENCE
+from agents.query_normalizer import normalize_query
+
+@pytest.mark.parametrize("text, terms", [
+    ("Are medical expenses from Day Care procedures covered?", "day care procedures"),
+    ("Is treatment in Ayurveda hospitals covered?", "ayurveda hospitals"),
+])
+def test_capitalised_phrases_are_not_taken_as_locations(text, terms):
+    parsed, confidence = normalize_query(text)
+    assert parsed.Location is None
+    assert terms in parsed.procedure
+    assert confidence < QUERY_LOCAL_CONFIDENCE
+
+def test_known_locations_are_extracted_locally():
+    parsed, confidence = normalize_query("46 year old male, knee surgery in Pune, 3 month policy")
+    assert (parsed.age, parsed.Location, parsed.duration) == (46, "Pune", "3 months")
+    assert parsed.procedure == "knee surgery"
+    assert confidence >= QUERY_LOCAL_CONFIDENCE
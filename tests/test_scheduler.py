@@ -0,0 +1,23 @@
+import time
+import threading
+from RAG.scheduler import AnswerScheduler
+
+def test_max_in_flight_is_shared_across_callers():
+    scheduler = AnswerScheduler(max_in_flight=2, rpm=0, tpm=0)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def call(_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.map, args=(call, list(range(4)))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2